@@ -0,0 +1,226 @@
+"""
+Move generation over a whole frontier at once with NumPy, the batch counterpart of
+`board.Board.move_gen` for the breadth first searches.
+
+States are the ``_pegs`` bitboards of `bitboard` in a uint64 array. NumPy is an
+optional dependency: without it `AVAILABLE` is False and the searches keep their
+per board loops.
+"""
+
+from array import array
+import bitboard
+import winnability
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AVAILABLE = np is not None
+
+# states handled at once, bounds the temporary (states x jumps) arrays
+CHUNK = 1 << 15
+
+_tables: dict[int, "_Tables"] = {}
+
+
+class _Tables:
+    """
+    NumPy copies of the tables of a `bitboard.Geometry`
+    """
+
+    def __init__(self, holes: int):
+        geometry = bitboard.geometry(holes)
+        self.holes = np.uint64(holes)
+        self.needs = np.array(
+            [needs for needs, _, _, _, _ in geometry.masks], np.uint64
+        )
+        self.dst = np.array([dst for _, dst, _, _, _ in geometry.masks], np.uint64)
+        self.flip = np.array([flip for _, _, flip, _, _ in geometry.masks], np.uint64)
+
+        rows = range(bitboard.SIZE)
+        patterns = range(1 << bitboard.SIZE)
+        # per row pattern, the pagoda totals of its cells, and the total of the goal
+        self.pagodas = np.array(
+            [
+                [
+                    [
+                        sum(
+                            pagoda[row * bitboard.SIZE + column]
+                            for column in range(bitboard.SIZE)
+                            if pattern >> column & 1
+                        )
+                        for pagoda in geometry.pagodas
+                    ]
+                    for pattern in patterns
+                ]
+                for row in rows
+            ],
+            np.int32,
+        ).reshape(bitboard.SIZE, 1 << bitboard.SIZE, len(geometry.pagodas))
+        self.goal = np.array(
+            [pagoda[bitboard.CENTER] for pagoda in geometry.pagodas], np.int32
+        )
+        # per row, the offset and the squeezed value of every pattern, see winnability.compress
+        compress = winnability._compress_tables(holes)
+        self.compress_offsets = [np.uint64(offset) for offset, _ in compress]
+        self.compress = np.array([table for _, table in compress], np.uint64)
+        # per symmetry of the holes, the image of every row pattern
+        self.images = np.array(
+            [
+                [
+                    [
+                        (bitboard._ROW_IMAGES[row][pattern] >> shift) & bitboard.FULL
+                        for pattern in patterns
+                    ]
+                    for row in rows
+                ]
+                for shift in geometry.symmetries
+            ],
+            np.uint64,
+        )
+
+
+def _get_tables(holes: int) -> _Tables:
+    if holes not in _tables:
+        _tables[holes] = _Tables(holes)
+    return _tables[holes]
+
+
+def _rows(states, row: int):
+    return ((states >> np.uint64(row * bitboard.SIZE)) & np.uint64(0x7F)).astype(
+        np.intp
+    )
+
+
+def _has_move(states, holes):
+    """
+    Vectorised `bitboard.has_move`
+    """
+    one, two = np.uint64(1), np.uint64(2)
+    size, double = np.uint64(bitboard.SIZE), np.uint64(2 * bitboard.SIZE)
+    empty = holes & ~states
+    movable = states & (states >> one) & (empty >> two)
+    movable &= np.uint64(bitboard._COLUMNS_LEFT)
+    movable |= (
+        states & (states << one) & (empty << two) & np.uint64(bitboard._COLUMNS_RIGHT)
+    )
+    movable |= states & (states >> size) & (empty >> double)
+    movable |= states & (states << size) & (empty << double)
+    return movable != 0
+
+
+def _pagoda_feasible(states, tables: _Tables):
+    """
+    Vectorised `bitboard.Geometry.pagoda_feasible` on the totals of the states
+    """
+    totals = sum(
+        tables.pagodas[row][_rows(states, row)] for row in range(bitboard.SIZE)
+    )
+    return np.all(totals >= tables.goal, axis=1)
+
+
+def _winnable(states, tables: _Tables, database):
+    """
+    Vectorised `winnability.WinnabilityDatabase.is_winnable`
+    """
+    keys = canonical(states, int(tables.holes))
+    index = np.zeros(len(keys), np.uint64)
+    for row in range(bitboard.SIZE):
+        index |= tables.compress[row][_rows(keys, row)] << tables.compress_offsets[row]
+    with database.bitmap() as view:
+        bits = np.frombuffer(view, np.uint8)
+        winnable = (bits[index >> np.uint64(3)] >> (index & np.uint64(7))) & 1
+        del bits
+    return winnable.astype(bool)
+
+
+def successors(states, holes: int):
+    """
+    Applies every jump to every state at once, and drops the children `Board.move_gen` drops:
+    the losing ones when `winnability.DATABASE` covers the holes, else the ones without moves.
+    Returns the children, the index of their parent in states and the id of the jump
+    leading to them, as arrays.
+    """
+    tables = _get_tables(holes)
+    states = np.asarray(states, np.uint64)
+    legal = ((states[:, None] & tables.needs) == tables.needs) & (
+        (states[:, None] & tables.dst) == 0
+    )
+    parents, moves = np.nonzero(legal)
+    children = states[parents] ^ tables.flip[moves]
+
+    database = winnability.DATABASE
+    if database is not None and database.holes == holes:
+        keep = _winnable(children, tables, database)
+    else:
+        # a single marble left is kept, like Board.solvable does
+        keep = (children & (children - np.uint64(1))) == 0
+        keep |= _has_move(children, tables.holes)
+    if len(tables.goal) != 0:
+        keep &= _pagoda_feasible(children, tables)
+    return children[keep], parents[keep], moves[keep]
+
+
+def predecessors(states, holes: int):
+    """
+    Applies every jump backwards to every state at once, the batch counterpart of
+    `Board._parents`, without any pruning. Returns the parents as an array.
+    """
+    tables = _get_tables(holes)
+    states = np.asarray(states, np.uint64)
+    # the marble sits on the destination, the source and the jumped over cell are empty
+    legal = ((states[:, None] & tables.dst) != 0) & (
+        (states[:, None] & tables.needs) == 0
+    )
+    children, moves = np.nonzero(legal)
+    return states[children] ^ tables.flip[moves]
+
+
+def canonical(states, holes: int):
+    """
+    Vectorised `bitboard.canonical`, the smallest image of every state over the symmetries of the holes
+    """
+    tables = _get_tables(holes)
+    states = np.asarray(states, np.uint64)
+    rows = [_rows(states, row) for row in range(bitboard.SIZE)]
+    keys = None
+    for images in tables.images:
+        image = images[0][rows[0]]
+        for row in range(1, bitboard.SIZE):
+            image |= images[row][rows[row]]
+        keys = image if keys is None else np.minimum(keys, image)
+    return keys
+
+
+def expand(layer: array, holes: int, backward: bool = False) -> array:
+    """
+    Returns the sorted, deduplicated canonical keys of the children of every state of a layer,
+    or of the parents with backward
+    """
+    states = np.frombuffer(layer, np.uint64) if len(layer) else np.empty(0, np.uint64)
+    keys = []
+    for start in range(0, len(states), CHUNK):
+        chunk = states[start : start + CHUNK]
+        if backward:
+            neighbours = predecessors(chunk, holes)
+        else:
+            neighbours = successors(chunk, holes)[0]
+        keys.append(np.unique(canonical(neighbours, holes)))
+    if not keys:
+        return array("Q")
+    return array("Q", np.unique(np.concatenate(keys)).tobytes())
+
+
+def intersect(first: array, second: array) -> array:
+    """
+    Returns the keys found in both of two sorted, deduplicated arrays of keys
+    """
+    if not len(first) or not len(second):
+        return array("Q")
+    common = np.intersect1d(
+        np.frombuffer(first, np.uint64),
+        np.frombuffer(second, np.uint64),
+        assume_unique=True,
+    )
+    return array("Q", common.tobytes())
@@ -0,0 +1,402 @@
+"""
+Bit level encoding of the board, used as the core of `board.Board`.
+
+Every cell (row, column) of the 7x7 grid is mapped to bit ``row * SIZE + column``
+of a Python int. A board is then described by two integers: the mask of playable
+holes and the mask of holes currently holding a marble.
+"""
+
+SIZE = 7
+CELLS = SIZE * SIZE
+FULL = (1 << CELLS) - 1
+
+CENTER = 3 * SIZE + 3
+CENTER_BIT = 1 << CENTER
+
+# directions a marble can jump in, as (row, column) steps: up, left, down, right
+DIRECTIONS = [(-1, 0), (0, -1), (1, 0), (0, 1)]
+
+# cells which can still jump two columns to the right/left without leaving the row
+_COLUMNS_LEFT = sum(
+    1 << (row * SIZE + column) for row in range(SIZE) for column in range(SIZE - 2)
+)
+_COLUMNS_RIGHT = _COLUMNS_LEFT << 2
+_FIRST_COLUMN = sum(1 << (row * SIZE) for row in range(SIZE))
+_LAST_COLUMN = _FIRST_COLUMN << (SIZE - 1)
+
+
+def index(row: int, column: int) -> int:
+    """
+    Returns the bit index of a cell
+    """
+    return row * SIZE + column
+
+
+def bit(row: int, column: int) -> int:
+    """
+    Returns the mask with only the given cell set
+    """
+    return 1 << (row * SIZE + column)
+
+
+def in_bounds(row: int, column: int) -> bool:
+    return 0 <= row < SIZE and 0 <= column < SIZE
+
+
+def cells(mask: int):
+    """
+    Yields the bit index of every set cell in the mask, lowest first
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask: int) -> int:
+    return mask.bit_count()
+
+
+# the eight symmetries of the square (the dihedral group D4), as maps of (row, column)
+_LAST = SIZE - 1
+TRANSFORMS = [
+    lambda row, column: (row, column),  # identity
+    lambda row, column: (column, _LAST - row),  # rotate 90
+    lambda row, column: (_LAST - row, _LAST - column),  # rotate 180
+    lambda row, column: (_LAST - column, row),  # rotate 270
+    lambda row, column: (row, _LAST - column),  # mirror left-right
+    lambda row, column: (_LAST - row, column),  # mirror top-bottom
+    lambda row, column: (column, row),  # transpose
+    lambda row, column: (_LAST - column, _LAST - row),  # anti-transpose
+]
+
+# Every image of a board under the eight transforms is computed at once: image t
+# lives in the 64 bit lane starting at bit 64 * t, and _ROW_IMAGES[row][pattern]
+# holds the contribution of one row pattern to all eight lanes.
+_LANE = 64
+_ROW_IMAGES = [
+    [
+        sum(
+            bit(*transform(row, column)) << (_LANE * lane)
+            for lane, transform in enumerate(TRANSFORMS)
+            for column in range(SIZE)
+            if pattern >> column & 1
+        )
+        for pattern in range(1 << SIZE)
+    ]
+    for row in range(SIZE)
+]
+_ROW_MASK = (1 << SIZE) - 1
+
+
+def images(mask: int) -> int:
+    """
+    Returns all eight transformed images of the mask, packed into 64 bit lanes
+    """
+    packed = 0
+    for row in range(SIZE):
+        packed |= _ROW_IMAGES[row][(mask >> (row * SIZE)) & _ROW_MASK]
+    return packed
+
+
+def transform(mask: int, t: int) -> int:
+    """
+    Applies the t-th transform of `TRANSFORMS` to the mask
+    """
+    return (images(mask) >> (_LANE * t)) & FULL
+
+
+def canonical(pegs: int, holes: int) -> int:
+    """
+    Returns the smallest encoding of the marbles over every symmetry of the holes.
+    Two boards with the same holes get the same key exactly when one is a rotation
+    or reflection of the other.
+    """
+    packed = images(pegs)
+    return min((packed >> shift) & FULL for shift in geometry(holes).symmetries)
+
+
+# Conway's position classes: colour the cells by (row + column) % 3 and by
+# (row - column) % 3. A jump covers three cells in a line, one of each colour, so
+# it flips the parity of the marble count on every colour. The parity of the sum
+# of any two colours is therefore fixed for the whole game.
+_DIAGONALS = [
+    [
+        sum(
+            bit(row, column)
+            for row in range(SIZE)
+            for column in range(SIZE)
+            if (row + sign * column) % 3 == colour
+        )
+        for colour in range(3)
+    ]
+    for sign in (1, -1)
+]
+
+
+def position_class(pegs: int) -> int:
+    """
+    Returns the position class of the marbles as a 4 bit int, no jump ever changes it
+    """
+    position = 0
+    for colours in _DIAGONALS:
+        first, second, third = ((pegs & mask).bit_count() for mask in colours)
+        position = (position << 2) | ((first + second) & 1) << 1 | ((first + third) & 1)
+    return position
+
+
+def _movable(pegs: int, holes: int):
+    """
+    Yields, per direction, the mask of marbles which can jump that way
+    """
+    empty = holes & ~pegs
+    yield pegs & (pegs >> 1) & (empty >> 2) & _COLUMNS_LEFT
+    yield pegs & (pegs << 1) & (empty << 2) & _COLUMNS_RIGHT
+    yield pegs & (pegs >> SIZE) & (empty >> (2 * SIZE))
+    yield pegs & (pegs << SIZE) & (empty << (2 * SIZE))
+
+
+def has_move(pegs: int, holes: int) -> bool:
+    """
+    Returns True if at least one jump can be made, using whole-board shifts
+    """
+    # unrolled rather than any(_movable(...)), this runs for every generated child
+    empty = holes & ~pegs
+    if pegs & (pegs >> 1) & (empty >> 2) & _COLUMNS_LEFT:
+        return True
+    if pegs & (pegs << 1) & (empty << 2) & _COLUMNS_RIGHT:
+        return True
+    if pegs & (pegs >> SIZE) & (empty >> (2 * SIZE)):
+        return True
+    return bool(pegs & (pegs << SIZE) & (empty << (2 * SIZE)))
+
+
+def count_moves(pegs: int, holes: int) -> int:
+    """
+    Returns the number of jumps which can be made, using whole-board shifts
+    """
+    return sum(movable.bit_count() for movable in _movable(pegs, holes))
+
+
+def isolated(pegs: int) -> int:
+    """
+    Returns the mask of marbles without a marble directly next to them
+    """
+    neighbours = (
+        ((pegs << 1) & ~_FIRST_COLUMN)
+        | ((pegs >> 1) & ~_LAST_COLUMN)
+        | (pegs << SIZE)
+        | (pegs >> SIZE)
+    )
+    return pegs & ~neighbours
+
+
+# every (src, over, dst) triple of cells a jump can use on the 7x7 grid, in the
+# order moves are generated: cells row by row, then DIRECTIONS
+JUMPS = [
+    (
+        index(row, column),
+        index(row + d_row, column + d_col),
+        index(row + 2 * d_row, column + 2 * d_col),
+    )
+    for row in range(SIZE)
+    for column in range(SIZE)
+    for d_row, d_col in DIRECTIONS
+    if in_bounds(row + 2 * d_row, column + 2 * d_col)
+]
+
+
+# Pagoda functions: weights on the holes such that for every jump (src, over, dst)
+# weight(src) + weight(over) >= weight(dst). The total weight of the marbles can
+# then never grow, so a board whose total is already below the weight of the
+# centre can not end with a single marble in the centre.
+PAGODAS = {
+    "cross": """
+        . . 0 0 0 . .
+        . . 0 1 0 . .
+        0 0 0 0 0 0 0
+        0 1 0 1 0 1 0
+        0 0 0 0 0 0 0
+        . . 0 1 0 . .
+        . . 0 0 0 . .
+    """,
+    "rows": """
+        . . 0 0 0 . .
+        . . 1 2 1 . .
+        0 0 0 0 0 0 0
+        0 1 1 2 1 1 0
+        0 0 0 0 0 0 0
+        . . 1 2 1 . .
+        . . 0 0 0 . .
+    """,
+    "lattice": """
+        . . 0 0 0 . .
+        . . 2 1 2 . .
+        0 1 0 1 0 1 0
+        2 0 2 2 2 0 2
+        0 1 0 1 0 1 0
+        . . 2 1 2 . .
+        . . 0 0 0 . .
+    """,
+}
+
+# Pagoda totals of a board are packed into one int, one lane per pagoda. A lane
+# holds total - weight(centre) + _PAGODA_BIAS, so the board can still be finished
+# only while the top bit of every lane is set.
+_PAGODA_LANE = 16
+_PAGODA_BIAS = 1 << (_PAGODA_LANE - 1)
+
+
+# Linear features used by the heuristics of `board.Board`, packed into 16 bit
+# lanes: occupied corners, occupied potential corners and the Manhattan distance
+# of the marbles to the centre. A jump changes them by a fixed amount.
+CORNERS = sum(
+    bit(row, column)
+    for row, column in [(0, 2), (0, 4), (2, 0), (2, 6), (4, 0), (4, 6), (6, 2), (6, 4)]
+)
+POTENTIAL_CORNERS = CORNERS | sum(
+    bit(row, column) for row, column in [(2, 2), (2, 4), (4, 2), (4, 4)]
+)
+FEATURE_LANE = 16
+FEATURE_MASK = (1 << FEATURE_LANE) - 1
+_FEATURE_WEIGHTS = [
+    (CORNERS >> cell & 1)
+    | (POTENTIAL_CORNERS >> cell & 1) << FEATURE_LANE
+    | (abs(cell // SIZE - 3) + abs(cell % SIZE - 3)) << (2 * FEATURE_LANE)
+    for cell in range(CELLS)
+]
+
+
+def features(pegs: int) -> int:
+    """
+    Returns the packed linear features of the marbles
+    """
+    return sum(_FEATURE_WEIGHTS[cell] for cell in cells(pegs))
+
+
+def _parse_weights(s: str) -> list[int]:
+    return [0 if weight == "." else int(weight) for weight in s.split()]
+
+
+class Geometry:
+    """
+    Tables derived from a set of playable holes, built once and shared by every board on it
+    """
+
+    def __init__(self, holes: int):
+        self.holes = holes
+
+        # lane offsets of every transform that leaves the holes in place
+        packed = images(holes)
+        self.symmetries = tuple(
+            _LANE * t
+            for t in range(len(TRANSFORMS))
+            if (packed >> (_LANE * t)) & FULL == holes
+        )
+
+        # jumps with all three cells on the board, a jump id is an index in this list
+        self.jumps = [
+            (src, over, dst)
+            for src, over, dst in JUMPS
+            if holes >> src & 1 and holes >> over & 1 and holes >> dst & 1
+        ]
+
+        # stock pagodas (and their symmetric images) which hold on these holes
+        self.pagodas = []
+        for weights in PAGODAS.values():
+            weights = _parse_weights(weights)
+            for shift in self.symmetries:
+                image = [0] * CELLS
+                for cell in range(CELLS):
+                    row, column = divmod(cell, SIZE)
+                    image[index(*TRANSFORMS[shift // _LANE](row, column))] = weights[
+                        cell
+                    ]
+                if self._is_pagoda(image) and image not in self.pagodas:
+                    self.pagodas.append(image)
+        self.pagoda_weights = [
+            sum(
+                pagoda[cell] << (_PAGODA_LANE * lane)
+                for lane, pagoda in enumerate(self.pagodas)
+            )
+            for cell in range(CELLS)
+        ]
+        self.pagoda_base = sum(
+            (_PAGODA_BIAS - pagoda[CENTER]) << (_PAGODA_LANE * lane)
+            for lane, pagoda in enumerate(self.pagodas)
+        )
+        self.pagoda_sign = sum(
+            _PAGODA_BIAS << (_PAGODA_LANE * lane) for lane in range(len(self.pagodas))
+        )
+
+        # per jump: cells which must hold marbles, cell which must be empty,
+        # cells flipped, the change of the packed pagoda totals and features
+        self.masks = tuple(
+            (
+                (1 << src) | (1 << over),
+                1 << dst,
+                (1 << src) | (1 << over) | (1 << dst),
+                self.pagoda_weights[dst]
+                - self.pagoda_weights[src]
+                - self.pagoda_weights[over],
+                _FEATURE_WEIGHTS[dst] - _FEATURE_WEIGHTS[src] - _FEATURE_WEIGHTS[over],
+            )
+            for src, over, dst in self.jumps
+        )
+        self.jump_ids = {(src, dst): j for j, (src, _, dst) in enumerate(self.jumps)}
+        self.jumps_from = [[] for _ in range(CELLS)]
+        for j, (src, _, _) in enumerate(self.jumps):
+            self.jumps_from[src].append(j)
+        # jump ids by the distance of their destination to the centre, closest first
+        self.central_jumps = sorted(
+            range(len(self.jumps)),
+            key=lambda j: abs(self.jumps[j][2] // SIZE - 3)
+            + abs(self.jumps[j][2] % SIZE - 3),
+        )
+
+    def _is_pagoda(self, weights: list[int]) -> bool:
+        """
+        Checks the pagoda condition on every jump, pagodas which give no weight
+        to the centre can never rule out a board and are rejected as well
+        """
+        if not self.holes & CENTER_BIT or weights[CENTER] <= 0:
+            return False
+        return all(
+            weights[src] + weights[over] >= weights[dst]
+            for src, over, dst in self.jumps
+        )
+
+    def pagoda(self, pegs: int) -> int:
+        """
+        Returns the packed pagoda totals of the marbles
+        """
+        return self.pagoda_base + sum(self.pagoda_weights[cell] for cell in cells(pegs))
+
+    def pagoda_feasible(self, pagoda: int) -> bool:
+        """
+        Returns False if any pagoda proves the centre can not be the last marble
+        """
+        return pagoda & self.pagoda_sign == self.pagoda_sign
+
+
+_geometries: dict[int, Geometry] = {}
+
+
+def geometry(holes: int) -> Geometry:
+    """
+    Returns the (cached) tables for a set of holes
+    """
+    if holes not in _geometries:
+        _geometries[holes] = Geometry(holes)
+    return _geometries[holes]
+
+
+# the standard 33 hole english board
+ENGLISH_HOLES = sum(
+    bit(row, column)
+    for row in range(SIZE)
+    for column in range(SIZE)
+    if 2 <= row <= 4 or 2 <= column <= 4
+)
+ENGLISH_START = ENGLISH_HOLES & ~CENTER_BIT
+ENGLISH = geometry(ENGLISH_HOLES)
@@ -4,38 +4,31 @@ Contains code to describe the current state of the game.
 
 from __future__ import annotations
 from enum import Enum
-from collections import defaultdict
 import pickle
-from typing import Dict, Self
-from search import dhokla_first_search, best_first_search, bread_first_search
+from typing import Callable, Iterator, Self
+from search import (
+    dhokla_first_search,
+    best_first_search,
+    bread_first_search,
+    layered_bread_first_search,
+    external_bread_first_search,
+    a_star_search,
+    ida_star_search,
+    bidirectional_search,
+    HEURISTICS,
+    MOVE_ORDERS,
+    Tablebase,
+)
 from utils import Position
 from search import Node
-import copy
+import bitboard
+import winnability
+import os
+import sys
 import time
 
 import argparse
 
-_POSITIONS = [Position(-1, 0), Position(1, 0), Position(0, 1), Position(0, -1)]
-
-
-def construct_matrix_from_hashmap(board_hashmap):
-    n = 7
-    matrix = [[board_hashmap[Position(i, j)] for j in range(n)] for i in range(n)]
-    return matrix
-
-
-def rotate90(mat_mat):
-    n = len(mat_mat)
-    matrix = [[mat_mat[j][i] for j in range(n)] for i in range(n)]
-    # Reverse each row
-    for i in range(n):
-        matrix[i].reverse()
-    return matrix
-
-
-def str_matrix(matrix: list[list[NodeState]]):
-    return "".join(["".join([str(s) for s in row]) for row in matrix])
-
 
 class Move:
     """
@@ -56,6 +49,25 @@ class Move:
         return self.src + dir
 
 
+class Infeasible:
+    """
+    Proof that a board can not reach the goal, returned by the solvers instead of a sequence
+    """
+
+    def __init__(self, board: Board, reason: str):
+        self.board = board
+        self.reason = reason
+
+    def __bool__(self):
+        return False
+
+    def __str__(self) -> str:
+        return f"Provably unsolvable: {self.reason}"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
 class NodeState(Enum):
     """
     Describes possible states a node on the board can take
@@ -74,39 +86,37 @@ class NodeState(Enum):
 
 class Board:
     """
-    Defines the current board state, next possible moves, can also execute a move
-    """
+    Defines the current board state, next possible moves, can also execute a move.
 
-    def __init__(self):
+    The grid is stored as two bitboards (see `bitboard`): `_holes` marks the
+    playable holes and `_pegs` marks the holes holding a marble.
+    """
 
-        self._SIZE = 7
-        self._CENTER = Position(3, 3)
+    _SIZE = bitboard.SIZE
+    _CENTER = Position(3, 3)
 
+    def __init__(self):
         # state
-        self.num_marbles = 32
-        self._board: Dict[Position, NodeState] = defaultdict(lambda: NodeState.INVALID)
-
-        # Initialize the starting grid
-
-        # top sub grid
-        for row in range(2):
-            for column in range(self._SIZE):
-                if column > 1 and column < 5:
-                    self._board[Position(row, column)] = NodeState.FILLED
-
-        # middle sub grids
-        for row in range(2, 5):
-            for column in range(self._SIZE):
-                self._board[Position(row, column)] = NodeState.FILLED
-
-        # leave the middle empty
-        self._board[Position(3, 3)] = NodeState.EMPTY
-
-        # top sub grid
-        for row in range(5, self._SIZE):
-            for column in range(self._SIZE):
-                if column > 1 and column < 5:
-                    self._board[Position(row, column)] = NodeState.FILLED
+        self._holes = bitboard.ENGLISH_HOLES
+        self._pegs = bitboard.ENGLISH_START
+        self._key = None
+        self._pagoda = None
+        self._features = None
+
+    def _spawn(
+        self, pegs: int, pagoda: int | None = None, features: int | None = None
+    ) -> Board:
+        """
+        Returns a board with the same holes but a different set of marbles
+        """
+        # skip __init__, the starting grid would be thrown away anyway
+        new_board = object.__new__(type(self))
+        new_board._holes = self._holes
+        new_board._pegs = pegs
+        new_board._key = None
+        new_board._pagoda = pagoda
+        new_board._features = features
+        return new_board
 
     @classmethod
     def construct_from_string(cls, s: str):
@@ -115,33 +125,36 @@ class Board:
         """
         s = s.replace("\n", "").replace(" ", "")
         new_board = cls()
-        new_board.num_marbles = 0
+        new_board._holes = 0
+        new_board._pegs = 0
         for row in range(new_board._SIZE):
             for column in range(new_board._SIZE):
-                new_board._board[Position(row, column)] = NodeState(
+                new_board[Position(row, column)] = NodeState(
                     s[row * new_board._SIZE + column]
                 )
-                if new_board._board[Position(row, column)] == NodeState.FILLED:
-                    new_board.num_marbles += 1
 
         return new_board
 
+    @property
+    def num_marbles(self) -> int:
+        return self._pegs.bit_count()
+
     def __hash__(self) -> int:
-        # to allow for hashing of the board state, we use the string representation
-        # create a list of all rotated states
-        top = construct_matrix_from_hashmap(self._board) # create a matrix from the hashmap
-        hashed = hash(str_matrix(top)) # create a string of the matrix and hash it
-        for _ in range(3):
-            top = rotate90(top)
-            hashed += hash(str_matrix(top))
+        return self.canonical_key()
 
-        return hashed
+    def canonical_key(self) -> int:
+        """
+        Returns an exact integer key of the board, shared by all its rotations and reflections
+        """
+        if self._key is None:
+            self._key = bitboard.canonical(self._pegs, self._holes)
+        return self._key
 
     def __str__(self) -> str:
         s = ""
         for row in range(self._SIZE):
             for column in range(self._SIZE):
-                s += self._board[Position(row, column)].value + " "
+                s += self[Position(row, column)].value + " "
 
             s += "\n"
         s += f"MARBLES: {self.num_marbles}\n"
@@ -151,10 +164,29 @@ class Board:
         return str(self)
 
     def __getitem__(self, pos: Position) -> NodeState:
-        return self._board[pos]
+        if not bitboard.in_bounds(pos.row, pos.column):
+            return NodeState.INVALID
+        mask = bitboard.bit(pos.row, pos.column)
+        if self._pegs & mask:
+            return NodeState.FILLED
+        if self._holes & mask:
+            return NodeState.EMPTY
+        return NodeState.INVALID
 
     def __setitem__(self, pos: Position, value: NodeState):
-        self._board[pos] = value
+        mask = bitboard.bit(pos.row, pos.column)
+        if value == NodeState.INVALID:
+            self._holes &= ~mask
+        else:
+            self._holes |= mask
+
+        if value == NodeState.FILLED:
+            self._pegs |= mask
+        else:
+            self._pegs &= ~mask
+        self._key = None
+        self._pagoda = None
+        self._features = None
 
     def __lt__(self, other: Self):
         # return self.num_marbles < other.num_marbles
@@ -162,81 +194,70 @@ class Board:
         return self._num_corners() < other._num_corners()
 
     def __eq__(self, other):
-        return hash(self) == hash(other)
+        if not isinstance(other, Board):
+            return NotImplemented
+        return (
+            self._holes == other._holes
+            and self.canonical_key() == other.canonical_key()
+        )
+
+    def _pagoda_totals(self) -> int:
+        """
+        Returns the packed pagoda totals of the board, see `bitboard.PAGODAS`
+        """
+        if self._pagoda is None:
+            self._pagoda = bitboard.geometry(self._holes).pagoda(self._pegs)
+        return self._pagoda
 
-    def _total_possible_moves(self):
-        marble_positions = [
-            pos for pos, state in self._board.items() if state == NodeState.FILLED
+    def _feature_totals(self) -> int:
+        """
+        Returns the packed linear features of the board, see `bitboard.features`.
+        Boards made by a move from a board which knows its features get them by
+        a fixed per jump delta instead of a scan.
+        """
+        if self._features is None:
+            self._features = bitboard.features(self._pegs)
+        return self._features
+
+    def positions(self) -> list[Position]:
+        """
+        Returns every playable hole on the board
+        """
+        return [
+            Position(*divmod(cell, self._SIZE)) for cell in bitboard.cells(self._holes)
         ]
-        total = 0
-        for marble in marble_positions:
-            total += len(self.get_possible_move_locations(marble))
-        return total
+
+    def _total_possible_moves(self):
+        """
+        Potential Heuristic: Counts the number of jumps which can be made
+        """
+        return bitboard.count_moves(self._pegs, self._holes)
 
     def _distance_from_center(self):
         """
         Potential Heuristic: Manhattan distance of all marbles from the center
         """
-        marble_positions = [
-            pos for pos, state in self._board.items() if state == NodeState.FILLED
-        ]
-        manhattan = 0
-        for position in marble_positions:
-            diff = self._CENTER - position
-            manhattan += abs(diff.row) + abs(diff.column)
-        return manhattan
+        return self._feature_totals() >> (2 * bitboard.FEATURE_LANE)
 
     def _num_isolated(self):
         """
         Potential Heuristic: Counts the number of marbles which have no adjacent marbles
         """
-        marble_positions = [
-            pos for pos, state in self._board.items() if state == NodeState.FILLED
-        ]
-        count = 0
-        for position in marble_positions:
-            found = 0
-            for neig in _POSITIONS:
-                if self._board[position + neig] == NodeState.FILLED:
-                    found = 0
-                    break
-                else:
-                    found += 1
-            count += 1 if found else 0
-        return count
-    
+        return bitboard.isolated(self._pegs).bit_count()
+
     def _num_marbles(self):
         """
         Potential Heuristic: Counts the number of marbles
         """
         return self.num_marbles
-    
+
     def _num_corners(self):
         """
         Final Heuristic: Mathematics related to # of corners occupied, and # of marbles that can move to corners
         """
-
-        # corners: cB
-        cB_pos = [
-            Position(0, 2),
-            Position(0, 4),
-            Position(2, 0),
-            Position(2, 6),
-            Position(4, 0),
-            Position(4, 6),
-            Position(6, 2),
-            Position(6, 4),
-        ]
-        # potential corners: pB
-        pB_pos = [
-            Position(2, 2),
-            Position(2, 4),
-            Position(4, 2),
-            Position(4, 4),
-        ] + cB_pos
-
-        cB_count = [self._board[pos] for pos in cB_pos].count(NodeState.FILLED)
-        pB_count = [self._board[pos] for pos in pB_pos].count(NodeState.FILLED)
+        features = self._feature_totals()
+        cB_count = features & bitboard.FEATURE_MASK
+        pB_count = (features >> bitboard.FEATURE_LANE) & bitboard.FEATURE_MASK
 
         return cB_count + (pB_count // 4)
 
@@ -248,125 +269,335 @@ class Board:
             # solved!
             return True
 
-        marble_positions = [
-            pos for pos, state in self._board.items() if state == NodeState.FILLED
-        ]
-        # compute the distance between this marble and every other marble
-        for marble in marble_positions:
-            if len(self.get_possible_move_locations(marble)) != 0:
-                return True
-        return False
+        return bitboard.has_move(self._pegs, self._holes)
 
-    def make_move(self, move: Move) -> Board | None:
+    def check_feasible(self) -> Infeasible | None:
         """
-        Returns a new game state (Board) based on the move.
-        If move is illegal will return None.
+        Returns an Infeasible proof if the goal can never be reached from this board.
+        Only constant time invariants are checked, so None does not promise a solution.
+        """
+        if not self._holes & bitboard.CENTER_BIT:
+            return Infeasible(self, "the board has no centre hole")
+        if self.num_marbles == 0:
+            return Infeasible(self, "the board has no marbles")
+
+        if bitboard.position_class(self._pegs) != bitboard.position_class(
+            bitboard.CENTER_BIT
+        ):
+            return Infeasible(
+                self, "the position class differs from a single centre marble"
+            )
+
+        if not bitboard.geometry(self._holes).pagoda_feasible(self._pagoda_totals()):
+            return Infeasible(self, "a pagoda function rules out the centre")
+
+        database = winnability.DATABASE
+        if (
+            database is not None
+            and database.covers(self)
+            and not database.is_winnable(self)
+        ):
+            return Infeasible(
+                self, "the winnability database has no path to the centre"
+            )
+
+        return None
+
+    def _jump_id(self, move: Move) -> int | None:
+        """
+        Returns the id of the jump in the geometry tables matching the move, None if there is none
         """
         src, dst = move.src, move.dst
 
-        # region: check if the move is valid
-
-        # checking if move is within the playable region
-        if self[src] == NodeState.INVALID and self[dst] == NodeState.INVALID:
+        # check that both ends are within the bounds
+        if not bitboard.in_bounds(src.row, src.column):
             return None
-
-        # check that dest is empty
-        if self[dst] != NodeState.EMPTY:
+        if not bitboard.in_bounds(dst.row, dst.column):
             return None
 
-        mag_row = abs(src.row - dst.row)
-        mag_col = abs(src.column - dst.column)
+        # the move has to be one of the jumps on this board
+        # (up, down, left or right by two steps, over a hole)
+        return bitboard.geometry(self._holes).jump_ids.get(
+            (bitboard.index(src.row, src.column), bitboard.index(dst.row, dst.column))
+        )
 
-        # check for diagonals - diagnols are not allowed
-        if mag_row != 0 and mag_col != 0:
-            return None
-
-        # check that move is only two steps (move can only by up,down,left,right in 2 steps. )
-        if not ((mag_row == 2 and mag_col == 0) or (mag_row == 0 and mag_col == 2)):
-            return None
+    def _can_jump(self, jump: int) -> bool:
+        # a marble has to jump over another marble into an empty hole
+        needs, dst_bit = bitboard.geometry(self._holes).masks[jump][:2]
+        return self._pegs & needs == needs and not self._pegs & dst_bit
 
-        # check that dst is present within the bounds
-        if dst.row >= self._SIZE or dst.column >= self._SIZE:
-            return None
-        if dst.row < 0 or dst.column < 0:
+    def make_move(self, move: Move) -> Board | None:
+        """
+        Returns a new game state (Board) based on the move.
+        If move is illegal will return None.
+        """
+        jump = self._jump_id(move)
+        if jump is None or not self._can_jump(jump):
             return None
 
-        # endregion
-
-        # region: making a new board state
-
-        new_board = Board()
-        new_board._board = copy.deepcopy(self._board)
-        new_board.num_marbles = self.num_marbles
-
-        # removing the marble from current pos
-        new_board[src] = NodeState.EMPTY
-        # setting the marble to the dest position
-        new_board[dst] = NodeState.FILLED
+        _, _, flip, pagoda_delta, feature_delta = bitboard.geometry(self._holes).masks[
+            jump
+        ]
+        pagoda = None if self._pagoda is None else self._pagoda + pagoda_delta
+        features = None if self._features is None else self._features + feature_delta
+        return self._spawn(self._pegs ^ flip, pagoda, features)
 
-        # remove a marble if present in between path
-        in_between_pos = move.get_in_between_pos()
-        if new_board[in_between_pos] == NodeState.FILLED:
-            new_board[in_between_pos] = NodeState.EMPTY
-            new_board.num_marbles -= 1
+    def apply(self, move: Move) -> bool:
+        """
+        Makes the move on this board in place, keeping every cached value consistent.
+        Returns False and leaves the board untouched if the move is illegal.
+        """
+        jump = self._jump_id(move)
+        if jump is None or not self._can_jump(jump):
+            return False
 
-        # endregion
+        self._apply_jump(jump)
+        return True
 
+    def undo(self, move: Move) -> bool:
+        """
+        Takes back a move made by apply, in place.
+        Returns False and leaves the board untouched if the move can not be taken back.
+        """
+        jump = self._jump_id(move)
+        if jump is None:
+            return False
+        # the marble has to sit on the destination, with the other two holes empty
+        _, dst_bit, flip = bitboard.geometry(self._holes).masks[jump][:3]
+        if self._pegs & flip != dst_bit:
+            return False
+
+        self._undo_jump(jump)
+        return True
+
+    def _apply_jump(self, jump: int):
+        _, _, flip, pagoda_delta, feature_delta = bitboard.geometry(self._holes).masks[
+            jump
+        ]
+        self._pegs ^= flip
+        self._key = None
+        if self._pagoda is not None:
+            self._pagoda += pagoda_delta
+        if self._features is not None:
+            self._features += feature_delta
+
+    def _undo_jump(self, jump: int):
+        _, _, flip, pagoda_delta, feature_delta = bitboard.geometry(self._holes).masks[
+            jump
+        ]
+        self._pegs ^= flip
+        self._key = None
+        if self._pagoda is not None:
+            self._pagoda -= pagoda_delta
+        if self._features is not None:
+            self._features -= feature_delta
+
+    def _jumps(self, order: str | Callable = "index") -> Iterator[int]:
+        """
+        Returns an iterator over the ids of the legal jumps which no pagoda rules out,
+        each one looked up only when asked for. The marbles are read on the call, so the
+        board may be changed in place while the iterator is consumed. See successors for
+        the orders.
+        """
+        geometry = bitboard.geometry(self._holes)
+        masks = geometry.masks
+        sign = geometry.pagoda_sign
+        pegs = self._pegs
+        pagoda = self._pagoda_totals()
+
+        if order == "index":
+            ids = range(len(masks))
+        elif order == "reverse":
+            ids = range(len(masks) - 1, -1, -1)
+        elif order == "center":
+            ids = geometry.central_jumps
+        elif callable(order):
+            ids = range(len(masks))
+        else:
+            raise ValueError(f"Unknown move order {order!r}")
+
+        jumps = (
+            jump
+            for jump in ids
+            if pegs & masks[jump][0] == masks[jump][0]
+            and not pegs & masks[jump][1]
+            and (pagoda + masks[jump][3]) & sign == sign
+        )
+        if not callable(order):
+            return jumps
+
+        # a heuristic has to see every child before the first one can be picked
+        scores = {}
+        for jump in jumps:
+            child = self.copy()
+            child._apply_jump(jump)
+            scores[jump] = order(child)
+        return iter(sorted(scores, key=scores.__getitem__))
+
+    def copy(self) -> Board:
+        """
+        Returns an independent copy of the board
+        """
+        new_board = self._spawn(self._pegs, self._pagoda, self._features)
+        new_board._key = self._key
         return new_board
 
     def get_possible_move_locations(self, src: Position) -> list[Position]:
         """
         Returns a list of possible move-to positions from the given position
         """
-        moves = []
-        for i in range(-2, 3, 2):
-            if i == 0:  # to avoid self moves
-                continue
-
-            if self[src + Position(i, 0)] == NodeState.EMPTY:
-                moves.append(Move(src, src + Position(i, 0)))
-            if self[src + Position(0, i)] == NodeState.EMPTY:
-                moves.append(Move(src, src + Position(0, i)))
+        if not bitboard.in_bounds(src.row, src.column):
+            return []
 
-        # filter the positions based on if the in-between has a marble
+        geometry = bitboard.geometry(self._holes)
+        pegs = self._pegs
+        moves = []
+        for jump in geometry.jumps_from[bitboard.index(src.row, src.column)]:
+            needs, dst_bit = geometry.masks[jump][:2]
+            # the in-between has to hold a marble, and the destination has to be free
+            if pegs & needs == needs and not pegs & dst_bit:
+                moves.append(Position(*divmod(geometry.jumps[jump][2], self._SIZE)))
 
-        return [
-            move.dst
-            for move in moves
-            if self[move.get_in_between_pos()] == NodeState.FILLED
-        ]
+        return moves
 
     def move_gen(self) -> list[Board]:
         """
         Generates all possible moves from the current state, eliminating states which do not reach termination
         """
+        return [board for _, board in self._children()]
 
-        boards: list[Board] = []
+    def successors(self, order: str | Callable = "index") -> Iterator[Board]:
+        """
+        Yields the children move_gen returns, one at a time: a child is only built, and
+        checked for dead ends, once the search asks for it. order is "index" (the order
+        of move_gen), "reverse" (the order a stack of them is popped in), "center" (jumps
+        landing closest to the centre first) or a function scoring boards, such as a
+        heuristic, lowest score first. Unlike _jumps, the
+        board must not be changed in place until the children are consumed.
+        """
+        database = winnability.DATABASE
+        if database is not None and not database.covers(self):
+            database = None
+
+        for jump in self._jumps(order):
+            child = self.copy()
+            child._apply_jump(jump)
+            if database is not None:
+                if not database.is_winnable(child):
+                    continue
+            elif not child.solvable():
+                continue
+            yield child
 
-        for row in range(self._SIZE):
-            for column in range(self._SIZE):
-                if self[Position(row, column)] == NodeState.FILLED:
+    def _children(self) -> list[tuple[int, Board]]:
+        """
+        Same as move_gen, but pairs every child with the id of the jump leading to it
+        """
 
-                    current = Position(row, column)
+        boards: list[tuple[int, Board]] = []
+        pegs = self._pegs
+        geometry = bitboard.geometry(self._holes)
+        pagoda = self._pagoda_totals()
+        sign = geometry.pagoda_sign
+        features = self._features
+        database = winnability.DATABASE
+        if database is not None and not database.covers(self):
+            database = None
+
+        for jump, (needs, dst_bit, flip, pagoda_delta, feature_delta) in enumerate(
+            geometry.masks
+        ):
+            if pegs & needs != needs or pegs & dst_bit:
+                continue
 
-                    # get all possible moves for that marble
-                    possible_dests = self.get_possible_move_locations(current)
-                    for dest in possible_dests:
-                        # compute the next states, can return a maximum of 4 valid states
-                        new_board = self.make_move(Move(current, dest))
-                        # if the move is invalid, or leads to a state where no more moves can be made, skip
-                        if new_board is None or not new_board.solvable():
-                            continue
+            # skip states where a pagoda proves the centre can not be reached
+            if (pagoda + pagoda_delta) & sign != sign:
+                continue
 
-                        boards.append(new_board)
+            # compute the next state, a jump flips exactly three holes
+            new_board = self._spawn(
+                pegs ^ flip,
+                pagoda + pagoda_delta,
+                None if features is None else features + feature_delta,
+            )
+            if database is not None:
+                # skip states which can not reach the goal
+                if not database.is_winnable(new_board):
+                    continue
+            # skip states where no more moves can be made
+            elif not new_board.solvable():
+                continue
+
+            boards.append((jump, new_board))
 
         return boards
 
+    def _child_keys(
+        self, score: Callable | None = None
+    ) -> list[tuple[int, int, int | None]]:
+        """
+        Same as _children without building the child boards: returns (jump, canonical key,
+        score) triples, for the frontiers which only build a board once it is expanded.
+        With a score function (a heuristic) every child is scored on one scratch board,
+        given the marbles and the totals of each child in turn, so score must not keep it.
+        """
+        keys: list[tuple[int, int, int | None]] = []
+        pegs = self._pegs
+        holes = self._holes
+        geometry = bitboard.geometry(holes)
+        pagoda = self._pagoda_totals()
+        sign = geometry.pagoda_sign
+        database = winnability.DATABASE
+        if database is not None and not database.covers(self):
+            database = None
+        if score is not None:
+            features = self._feature_totals()
+            scratch = self._spawn(pegs)
+
+        for jump, (needs, dst_bit, flip, pagoda_delta, feature_delta) in enumerate(
+            geometry.masks
+        ):
+            if pegs & needs != needs or pegs & dst_bit:
+                continue
+            if (pagoda + pagoda_delta) & sign != sign:
+                continue
+
+            child = pegs ^ flip
+            key = bitboard.canonical(child, holes)
+            if database is not None:
+                if not database.is_winnable_key(key):
+                    continue
+            # more than one marble left and no move, like solvable
+            elif child & (child - 1) and not bitboard.has_move(child, holes):
+                continue
+
+            if score is None:
+                keys.append((jump, key, None))
+                continue
+            scratch._pegs = child
+            scratch._key = key
+            scratch._pagoda = pagoda + pagoda_delta
+            scratch._features = features + feature_delta
+            keys.append((jump, key, score(scratch)))
+
+        return keys
+
+    def _parents(self) -> list[Board]:
+        """
+        Returns every board from which a single jump leads to this one, without any pruning
+        """
+        pegs = self._pegs
+        return [
+            self._spawn(pegs ^ flip)
+            for needs, dst_bit, flip, _, _ in bitboard.geometry(self._holes).masks
+            if pegs & dst_bit and not pegs & needs
+        ]
+
     def goal_test(self) -> bool:
         """
         Returns True if the game is over
         """
-        return self.num_marbles == 1 and self[self._CENTER] == NodeState.FILLED
+        return self._pegs == bitboard.CENTER_BIT
 
 
 """
@@ -384,8 +615,100 @@ if __name__ == "__main__":
         "--solver",
         type=str,
         default="best",
-        choices=["bfs", "dfs", "best", "manual"],
-        help="Solver to use. Options: bfs, dfs, best, manual. Default: best",
+        choices=[
+            "bfs",
+            "bfs-layered",
+            "bfs-external",
+            "dfs",
+            "best",
+            "astar",
+            "idastar",
+            "bidirectional",
+            "parallel-best",
+            "hda",
+            "portfolio",
+            "manual",
+        ],
+        help="Solver to use. Options: bfs, bfs-layered, bfs-external, dfs, best, astar, idastar, bidirectional, parallel-best, hda, portfolio, manual. Default: best",
+    )
+    parser.add_argument(
+        "--heuristic",
+        type=str,
+        default="corners",
+        help=f"Heuristic for best first search: one of {', '.join(HEURISTICS)}, or a weighted sum such as 2*corners+isolated. Default: corners",
+    )
+    parser.add_argument(
+        "--move-order",
+        type=str,
+        default="reverse",
+        help=f"Order dfs tries the jumps of a board in: one of {', '.join(MOVE_ORDERS)}, or a heuristic to try the children lowest score first. Default: reverse",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes of parallel-best and hda. Default: one per CPU",
+    )
+    parser.add_argument(
+        "--transport",
+        type=str,
+        default="queue",
+        choices=["queue", "socket"],
+        help="How the hda workers exchange boards: multiprocessing queues or local sockets. Default: queue",
+    )
+    parser.add_argument(
+        "--split-depth",
+        type=int,
+        default=2,
+        help="Depth at which parallel-best splits the search into subproblems. Default: 2",
+    )
+    parser.add_argument(
+        "--strategies",
+        type=str,
+        default=None,
+        help="Comma separated solvers raced by portfolio, best may be given a heuristic as best:<heuristic>. Default: dfs,best:corners,best:isolated,bfs",
+    )
+    parser.add_argument(
+        "--meet-at",
+        type=int,
+        default=None,
+        help="Number of marbles at which the two sides of the bidirectional search meet. Default: the side with the smaller layer grows next, balancing the two",
+    )
+    parser.add_argument(
+        "--scratch-dir",
+        type=str,
+        default="bfs-scratch",
+        help="Directory for the layers of bfs-external, an interrupted search resumes from it. Default: bfs-scratch",
+    )
+    parser.add_argument(
+        "--ram-limit",
+        type=int,
+        default=512,
+        help="Memory in MB bfs-external may use for a run before writing it to disk. Default: 512",
+    )
+    parser.add_argument(
+        "--disk-limit",
+        type=int,
+        default=None,
+        help="Scratch space in MB bfs-external may use. Default: no limit",
+    )
+    parser.add_argument(
+        "--tablebase",
+        type=int,
+        default=None,
+        help="Build an endgame tablebase of every winnable board with up to N marbles, bfs, dfs and best finish the search from it. Default: none",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=None,
+        help="MB the closed set of best (dead ends of dfs) may use before it turns into a bloom filter, which may skip unseen states. Default: no limit",
+    )
+    parser.add_argument(
+        "--database",
+        type=str,
+        default=None,
+        help="Winnability database built by winnability.py, solvers then only visit boards which can still be won. Default: none",
     )
     parser.add_argument(
         "--savefile",
@@ -395,6 +718,9 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
+    if args.database:
+        winnability.load(args.database)
+
     if args.start_file:
         with open(args.start_file, "r") as f:
             board = Board.construct_from_string(f.read())
@@ -404,17 +730,91 @@ if __name__ == "__main__":
     print("STARTING STATE")
     print(board)
 
+    infeasible = board.check_feasible()
+    if infeasible is not None and args.solver != "manual":
+        print(infeasible)
+        sys.exit(1)
+
     start_node = Node(board)
     st = time.time()
+    memory_budget = None if args.memory_budget is None else args.memory_budget * 2**20
+    tablebase = None
+    if args.tablebase is not None:
+        tablebase = Tablebase(board, args.tablebase)
+        print(
+            f"Tablebase: {len(tablebase)} winnable boards with up to {args.tablebase} marbles"
+        )
     if args.solver == "bfs":
         print("Using Breadth First Search")
-        sequence = bread_first_search(start_node)
+        sequence = bread_first_search(start_node, tablebase=tablebase)
+    elif args.solver == "bfs-layered":
+        print("Using Layered Breadth First Search")
+        sequence = layered_bread_first_search(start_node)
+    elif args.solver == "bfs-external":
+        print("Using External Memory Breadth First Search")
+        sequence = external_bread_first_search(
+            start_node,
+            args.scratch_dir,
+            args.ram_limit * 2**20,
+            None if args.disk_limit is None else args.disk_limit * 2**20,
+        )
     elif args.solver == "dfs":
         print("Using Depth First Search")
-        sequence = dhokla_first_search(start_node)
+        sequence = dhokla_first_search(
+            start_node,
+            tablebase=tablebase,
+            memory_budget=memory_budget,
+            move_order=args.move_order,
+        )
     elif args.solver == "best":
         print("Using Best First Search")
-        sequence = best_first_search(start_node)
+        sequence = best_first_search(
+            start_node,
+            heuristic=args.heuristic,
+            tablebase=tablebase,
+            memory_budget=memory_budget,
+        )
+    elif args.solver == "astar":
+        print("Using A* Search")
+        sequence = a_star_search(start_node)
+    elif args.solver == "idastar":
+        print("Using IDA* Search")
+        sequence = ida_star_search(start_node)
+    elif args.solver == "bidirectional":
+        print("Using Bidirectional Search")
+        sequence = bidirectional_search(start_node, args.meet_at)
+    elif args.solver == "parallel-best":
+        from search.parallel import parallel_search
+
+        print("Using Parallel Best First Search")
+        sequence = parallel_search(
+            start_node,
+            "best",
+            args.workers,
+            args.split_depth,
+            heuristic=args.heuristic,
+        )
+    elif args.solver == "hda":
+        from search.hda import SocketTransport, hda_star_search
+
+        print("Using Hash Distributed Best First Search")
+        sequence = hda_star_search(
+            start_node,
+            args.workers,
+            heuristic=args.heuristic,
+            transport=(
+                SocketTransport.local(args.workers or os.cpu_count())
+                if args.transport == "socket"
+                else None
+            ),
+        )
+    elif args.solver == "portfolio":
+        from search.portfolio import portfolio_search
+
+        print("Using a Portfolio of Solvers")
+        sequence = portfolio_search(
+            start_node, args.strategies.split(",") if args.strategies else None
+        )
     else:
         sequence = [board]
         old_board = None
@@ -443,6 +843,10 @@ if __name__ == "__main__":
 
         sequence = sequence[::-1]  # store in reverse order
 
+    if not sequence:
+        print(sequence if sequence is not None else "No solution found")
+        sys.exit(1)
+
     print(f"Time taken: {round(time.time() - st,3)}s | Steps taken: {len(sequence)}")
     pickle.dump([str(board) for board in sequence], open(args.savefile, "wb"))
 
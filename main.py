@@ -1,5 +1,6 @@
 import asyncio
 import enum
+import functools
 import time
 import pygame
 import constants as c
@@ -12,6 +13,10 @@ from search import (
     stepped_dhokla_first_search,
     stepped_best_first_search,
     stepped_bread_first_search,
+    stepped_a_star_search,
+    stepped_ida_star_search,
+    HEURISTICS,
+    KeySet,
 )
 import argparse
 
@@ -33,13 +38,23 @@ class GameState(enum.Enum):
     WIN = 3
 
 
+# solvers without a button of their own, started from the keyboard
+SOLVER_KEYS = {
+    pygame.K_a: "astar",
+    pygame.K_i: "idastar",
+}
+
+
 class Brainvita:
     """
     Game instance. To reset the game, create a new instance.
     """
 
     def __init__(
-        self, musician: MusicController, starting_state: str | None = None
+        self,
+        musician: MusicController,
+        starting_state: str | None = None,
+        heuristic: str = "corners",
     ) -> None:
 
         # Game state
@@ -50,9 +65,11 @@ class Brainvita:
 
         self.game_state = GameState.MANUAL
         self.algorithm = None
+        self.requested_algorithm = None
+        self.heuristic = heuristic
         self.autovars_open = None
         self.autovars_open_set = None
-        self.autovars_closed = set()
+        self.autovars_closed = KeySet()
         self.autostats = {
             "start_time": 0,
             "end_time": 0,
@@ -70,8 +87,8 @@ class Brainvita:
 
         # Create the marble sprites
         self.marble_list = pygame.sprite.Group()
-        for pos in self.board._board:
-            marble = Marble(pos, state=self.board._board[pos])
+        for pos in self.board.positions():
+            marble = Marble(pos, state=self.board[pos])
             self.marble_list.add(marble)
 
         # Create the buttons
@@ -128,9 +145,10 @@ class Brainvita:
         self.move_count = 0
         self.game_state = GameState.MANUAL
         self.algorithm = None
+        self.requested_algorithm = None
         self.autovars_open = None
         self.autovars_open_set = None
-        self.autovars_closed = set()
+        self.autovars_closed = KeySet()
         self.autostats = {
             "start_time": 0,
             "end_time": 0,
@@ -159,6 +177,18 @@ class Brainvita:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.is_game_over = True
+            if event.type == pygame.KEYDOWN and event.key in SOLVER_KEYS:
+                self.requested_algorithm = SOLVER_KEYS[event.key]
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                # cycle through the heuristics used by best first search
+                if self.game_state != GameState.ANIMATING:
+                    names = list(HEURISTICS)
+                    if self.heuristic in names:
+                        self.heuristic = names[
+                            (names.index(self.heuristic) + 1) % len(names)
+                        ]
+                    else:
+                        self.heuristic = names[0]
             if event.type == pygame.MOUSEMOTION:
                 # update button hover state
                 for button in self.button_list:
@@ -187,14 +217,11 @@ class Brainvita:
                                 < c.POS2COORD[move].y
                                 + 18 * c.SCALE_FACTOR  # 18 is the height of the marble
                             ):
-                                # move the marble
-                                new_board = self.board.make_move(
-                                    Move(self.selected_marble.pos, move)
-                                )
-                                if new_board:
-                                    self.undo_stack.append(self.board)
+                                # move the marble, in place
+                                marble_move = Move(self.selected_marble.pos, move)
+                                if self.board.apply(marble_move):
+                                    self.undo_stack.append(marble_move)
                                     self.musician.play_move_sound()
-                                    self.board = new_board
                                     self.move_count += 1
                                     self.update_marble_state()
                                     self.selected_marble = None
@@ -237,9 +264,15 @@ class Brainvita:
                 self.algorithm = "bestfs"
                 self.autostats["start_time"] = time.time()
             self.bestfs_button.unclick()
+        elif self.requested_algorithm is not None:
+            if self.game_state != GameState.ANIMATING:
+                self.game_state = GameState.ANIMATING
+                self.algorithm = self.requested_algorithm
+                self.autostats["start_time"] = time.time()
+            self.requested_algorithm = None
         elif self.undo_button.is_clicked:
             if self.game_state == GameState.MANUAL and len(self.undo_stack) > 0:
-                self.board = self.undo_stack.pop()
+                self.board.undo(self.undo_stack.pop())
                 self.move_count += 1  # undoing a move is also a move
                 self.update_marble_state()
             self.undo_button.unclick()
@@ -258,12 +291,23 @@ class Brainvita:
                 )
                 self.possible_positions = move_locations
         elif self.game_state == GameState.ANIMATING:
+            if self.autovars_open is None and self.board.check_feasible() is not None:
+                # the goal is provably out of reach, no need to search
+                self.game_state = GameState.LOST
+                return
+
             if self.algorithm == "dfs":
                 function = stepped_dhokla_first_search
             elif self.algorithm == "bfs":
                 function = stepped_bread_first_search
             elif self.algorithm == "bestfs":
-                function = stepped_best_first_search
+                function = functools.partial(
+                    stepped_best_first_search, heuristic=self.heuristic
+                )
+            elif self.algorithm == "astar":
+                function = stepped_a_star_search
+            elif self.algorithm == "idastar":
+                function = stepped_ida_star_search
 
             (
                 game_over,
@@ -278,9 +322,7 @@ class Brainvita:
                 self.autovars_closed,
             )
             self.board = board_node.board
-            self.autostats["steps"] = (
-                len(board_node.back_track()) - 1
-            )  # dont count the start state
+            self.autostats["steps"] = board_node.depth  # dont count the start state
             self.autostats["end_time"] = time.time()
             self.update_marble_state()
             self.move_count += 1
@@ -316,6 +358,11 @@ class Brainvita:
         )
         c.ROOT_DISPLAY.blit(rendered_text, (30, 150))
 
+        rendered_text = c.FONT_UI_MONO.render(
+            f"{'Heuristic:':<10}{self.heuristic:>20}", False, (0, 0, 0)
+        )
+        c.ROOT_DISPLAY.blit(rendered_text, (30, 480))
+
         self.marble_list.draw(c.ROOT_DISPLAY)
 
         if self.game_state == GameState.MANUAL:
@@ -374,11 +421,13 @@ class Brainvita:
         pygame.display.flip()
 
 
-async def main(starting_state: str | None = None):
+async def main(starting_state: str | None = None, heuristic: str = "corners"):
     """Main program function."""
 
     musician = MusicController()
-    game = Brainvita(musician=musician, starting_state=starting_state)
+    game = Brainvita(
+        musician=musician, starting_state=starting_state, heuristic=heuristic
+    )
 
     if sys.platform == "emscripten":  # for web
         platform.window.canvas.style.imageRendering = "pixelated"
@@ -408,14 +457,20 @@ if sys.platform != "emscripten":
         default=None,
         help="File containing the starting board state. If not provided, the default starting state is used.",
     )
+    parser.add_argument(
+        "--heuristic",
+        type=str,
+        default="corners",
+        help=f"Heuristic for best first search: one of {', '.join(HEURISTICS)}, or a weighted sum such as 2*corners+isolated. Default: corners",
+    )
     args = parser.parse_args()
 
     # asyncio is used to run the main function, for wasm compatibility
     if args.start_file:
         with open(args.start_file, "r") as f:
-            asyncio.run(main(f.read()))
+            asyncio.run(main(f.read(), heuristic=args.heuristic))
     else:
-        asyncio.run(main())
+        asyncio.run(main(heuristic=args.heuristic))
 
 else:
     # Wasm: No command line arguments
@@ -1,4 +1,15 @@
 from .bfs import *
 from .dfs import *
 from .bestfs import *
+from .astar import *
+from .idastar import *
 from ._node import *
+from .heuristics import *
+from .external import *
+from .tablebase import *
+from .bidirectional import *
+from .keyset import *
+from .bloom import *
+
+# parallel, hda and portfolio need multiprocessing, which the web build lacks:
+# import them from their modules where they are used
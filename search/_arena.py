@@ -0,0 +1,109 @@
+from array import array
+import bitboard
+
+# bits of an entry holding the jump, a full 7x7 board has 140 of them
+_MOVE_BITS = 8
+_MOVE_MASK = (1 << _MOVE_BITS) - 1
+
+
+class NodeArena:
+    """
+    Compact storage of a search tree: parallel arrays instead of linked Node objects.
+    A node is an index into the arrays and costs 15 bytes, against a Node and a
+    Board object per state otherwise.
+
+    boards holds the bit encoding of the marbles (Board._pegs) of each node, the
+    canonical keys used for duplicate detection are kept by the solvers.
+
+    The frontiers only store a node once it is expanded: until then a child is an
+    entry, one int packing the index of its parent and the jump from it, see entry.
+
+    With totals, the pagoda and feature totals of every node are kept as well, so
+    the boards rebuilt by board get them from their parent by the deltas of the
+    jump instead of a scan of their marbles. They are Python ints, about 90 bytes
+    a node, worth it for the expanded nodes only.
+    """
+
+    def __init__(self, totals: bool = False):
+        self.boards = array("Q")
+        self.parents = array("i")
+        self.depths = array("B")
+        # id of the jump which led to the node, -1 for the root
+        self.moves = array("h")
+        self.totals = totals
+        self.pagodas: list[int] = []
+        self.features: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.boards)
+
+    def add(self, pegs: int, parent: int = -1, move: int = -1) -> int:
+        """
+        Stores a node and returns its index
+        """
+        self.boards.append(pegs)
+        self.parents.append(parent)
+        self.depths.append(0 if parent < 0 else self.depths[parent] + 1)
+        self.moves.append(move)
+        return len(self.boards) - 1
+
+    @staticmethod
+    def entry(parent: int = -1, move: int = -1) -> int:
+        """
+        Packs a child which is not built yet, the root has no parent nor move
+        """
+        return (parent + 1) << _MOVE_BITS | (move + 1)
+
+    def add_entry(self, entry: int, board) -> int:
+        """
+        Stores the child of a packed entry and returns its index. board is the root,
+        the child applies the jump to the marbles of its parent.
+        """
+        parent = (entry >> _MOVE_BITS) - 1
+        move = (entry & _MOVE_MASK) - 1
+        if parent < 0:
+            if self.totals:
+                self.pagodas.append(board._pagoda_totals())
+                self.features.append(board._feature_totals())
+            return self.add(board._pegs)
+
+        _, _, flip, pagoda_delta, feature_delta = bitboard.geometry(board._holes).masks[
+            move
+        ]
+        if self.totals:
+            self.pagodas.append(self.pagodas[parent] + pagoda_delta)
+            self.features.append(self.features[parent] + feature_delta)
+        return self.add(self.boards[parent] ^ flip, parent, move)
+
+    def board(self, index: int, board):
+        """
+        Returns the board of a node, board is any board with the same holes
+        """
+        if self.totals:
+            return board._spawn(
+                self.boards[index], self.pagodas[index], self.features[index]
+            )
+        return board._spawn(self.boards[index])
+
+    def nbytes(self) -> int:
+        return sum(
+            column.itemsize * len(column)
+            for column in (self.boards, self.parents, self.depths, self.moves)
+        )
+
+    def path(self, index: int) -> list[int]:
+        """
+        Returns the indices from the node up to the root
+        """
+        indices = []
+        while index >= 0:
+            indices.append(index)
+            index = self.parents[index]
+        return indices
+
+    def back_track(self, index: int, board) -> list:
+        """
+        Returns the boards from the node up to the root, like Node.back_track.
+        board is any board with the same holes, used to build the others.
+        """
+        return [board._spawn(self.boards[i]) for i in self.path(index)]
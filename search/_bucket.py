@@ -0,0 +1,90 @@
+from array import array
+from collections import deque
+
+# more jumps than any game on a 7x7 board can make, and more than any board
+# allows at once, see the ranked tie breaks
+_RANKS = 64
+
+
+class BucketQueue:
+    """
+    Priority queue for small integer scores: one FIFO bucket per score, popped
+    lowest score first. Pushing and popping are O(1) amortised, scores are
+    compared once on insertion instead of on every heap sift.
+
+    tie_break decides which of the items sharing the lowest score comes out first:
+    "fifo" pops the oldest, "lifo" the newest, "depth" the one pushed with the
+    largest rank (its depth), then the newest, and "mobility" the one pushed with
+    the largest rank (the number of jumps its board allows), then the oldest.
+
+    packed keeps the items, which then have to be ints in [0, 2**64), in arrays at
+    8 bytes each instead of deques of int objects.
+    """
+
+    def __init__(self, tie_break: str = "fifo", packed: bool = False):
+        if tie_break not in ("fifo", "lifo", "depth", "mobility"):
+            raise ValueError(f"Unknown tie break policy: {tie_break}")
+        self.tie_break = tie_break
+        self._new_bucket = (lambda: array("Q")) if packed else deque
+        self._buckets: list = []
+        # per packed bucket, the index of its oldest item, for fifo
+        self._heads: list[int] = []
+        # score of _buckets[0], buckets grow in both directions as scores arrive
+        self._base = 0
+        # index of the lowest bucket that may be non empty
+        self._lowest = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, score: int, item, rank: int = 0):
+        if self.tie_break in ("depth", "mobility"):
+            # one bucket per score and rank, higher ranks sort first within a score
+            score = score * _RANKS - min(rank, _RANKS - 1)
+        index = score - self._base
+        if not self._buckets:
+            self._base = score
+            index = 0
+        elif index < 0:
+            self._buckets[:0] = [self._new_bucket() for _ in range(-index)]
+            self._heads[:0] = [0] * -index
+            self._lowest -= index
+            self._base = score
+            index = 0
+        if index >= len(self._buckets):
+            grow = index - len(self._buckets) + 1
+            self._buckets.extend(self._new_bucket() for _ in range(grow))
+            self._heads.extend([0] * grow)
+
+        self._buckets[index].append(item)
+        if index < self._lowest:
+            self._lowest = index
+        self._size += 1
+
+    def pop(self):
+        if self._size == 0:
+            raise IndexError("pop from an empty BucketQueue")
+
+        while not self._buckets[self._lowest]:
+            self._lowest += 1
+
+        self._size -= 1
+        bucket = self._buckets[self._lowest]
+        if self.tie_break in ("lifo", "depth"):
+            return bucket.pop()
+        if isinstance(bucket, deque):
+            return bucket.popleft()
+
+        # an array can not pop from the left cheaply, its head moves instead
+        head = self._heads[self._lowest]
+        item = bucket[head]
+        head += 1
+        if head == len(bucket):
+            del bucket[:]
+            head = 0
+        elif 2 * head > len(bucket):
+            del bucket[:head]
+            head = 0
+        self._heads[self._lowest] = head
+        return item
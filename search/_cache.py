@@ -0,0 +1,30 @@
+from collections import OrderedDict
+
+
+class DeadStateCache:
+    """
+    Size bounded set of canonical board keys proven to never reach the goal.
+    When full, the least recently used key is evicted: forgetting a dead state
+    only costs the time to prove it again.
+    """
+
+    def __init__(self, max_size: int = 1_000_000):
+        self.max_size = max_size
+        self.evictions = 0
+        self._keys: OrderedDict[int, None] = OrderedDict()
+
+    def __contains__(self, key: int) -> bool:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: int):
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+            self.evictions += 1
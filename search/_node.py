@@ -6,9 +6,13 @@ class Node:
     A wrapper class to represent a state and keep track of its parent
     """
 
-    def __init__(self, board, parent: Self | None = None):
+    def __init__(self, board, parent: Self | None = None, score: int | None = None):
         self.board = board
         self.parent = parent
+        # number of moves from the root
+        self.depth = 0 if parent is None else parent.depth + 1
+        # heuristic value of the board, computed once by the informed solvers
+        self.score = score
 
     def __lt__(self, other: Self):
         return self.board < other.board
@@ -18,9 +22,8 @@ class Node:
         Traverse parents and returns a list of all ancestor including current node
         """
         sequence = sequence[:]
-        if self.parent == None:
-            sequence.append(self.board)
-            return sequence
-
-        sequence.append(self.board)
-        return self.parent.back_track(sequence)
+        node = self
+        while node is not None:
+            sequence.append(node.board)
+            node = node.parent
+        return sequence
@@ -0,0 +1,97 @@
+from search._node import Node
+import heapq
+import itertools
+
+# insertion counter, the most recently generated node wins remaining ties
+_order = itertools.count()
+
+
+def remaining_moves(board) -> int:
+    """
+    Admissible heuristic: every jump removes exactly one marble, so at least
+    num_marbles - 1 moves are left. Boards which a pagoda rules out never reach
+    the open list (move_gen drops them), which acts as an infinite estimate.
+    """
+    return board.num_marbles - 1
+
+
+def _push(open: list, node: Node, cost: int):
+    # ties on f are broken towards deeper nodes, then newer nodes
+    heapq.heappush(
+        open, (cost + remaining_moves(node.board), -cost, -next(_order), node)
+    )
+
+
+def a_star_search(start_node: Node):
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+
+    prev_marble_count = start_node.board.num_marbles
+
+    # keep track of all the visited states ie Board
+    closed = set()
+    # queue of (f, -g, -order, node) for the states that haven't been visited
+    open = []
+    _push(open, start_node, 0)
+    open_set = set([start_node.board.canonical_key()])
+
+    while len(open) != 0:
+        _, neg_cost, _, parent = heapq.heappop(open)
+        open_set.discard(parent.board.canonical_key())
+
+        if parent.board.goal_test():
+            return parent.back_track()
+        else:
+            if prev_marble_count > parent.board.num_marbles:
+                prev_marble_count = parent.board.num_marbles
+                print(f"Marbles left: {parent.board.num_marbles}")
+
+            closed.add(parent.board.canonical_key())
+            children = parent.board.move_gen()
+            # removing already visited states
+            children = [
+                child
+                for child in children
+                if child.canonical_key() not in closed
+                and child.canonical_key() not in open_set
+            ]
+            for child in children:
+                _push(open, Node(child, parent), 1 - neg_cost)
+                open_set.add(child.canonical_key())
+
+    return None
+
+
+def stepped_a_star_search(
+    node: Node, open: list | None, open_set: set | None, closed: set
+):
+
+    if open is None and open_set is None:
+        open = []
+        _push(open, node, 0)
+        # same kind of set as the closed set the caller keeps
+        open_set = type(closed)([node.board.canonical_key()])
+
+    _, neg_cost, _, parent = heapq.heappop(open)
+    open_set.discard(parent.board.canonical_key())
+
+    if parent.board.goal_test():
+        return True, parent, open, open_set, closed
+    else:
+
+        closed.add(parent.board.canonical_key())
+        children: list = parent.board.move_gen()
+
+        children = [
+            child
+            for child in children
+            if child.canonical_key() not in closed
+            and child.canonical_key() not in open_set
+        ]
+
+        for child in children:
+            _push(open, Node(child, parent), 1 - neg_cost)
+            open_set.add(child.canonical_key())
+
+        return False, parent, open, open_set, closed
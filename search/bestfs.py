@@ -1,68 +1,128 @@
 from search._node import Node
-import heapq
+from search._arena import NodeArena
+from search.tablebase import Tablebase
+from search.keyset import KeySet
+from search.bloom import BoundedKeySet
+from search._bucket import BucketQueue
+from search.heuristics import get_heuristic
 
 
-def best_first_search(start_node: Node):
+def _rate(score, tie_break: str):
+    """
+    Returns a function giving the score of a board and the rank breaking ties
+    between equal scores, see BucketQueue. None ranks a board by its depth.
+    """
+    if tie_break == "mobility":
+        return lambda board: (score(board), board._total_possible_moves())
+    return lambda board: (score(board), None)
+
+
+def best_first_search(
+    start_node: Node,
+    tie_break: str = "mobility",
+    heuristic: str = "corners",
+    tablebase: Tablebase | None = None,
+    memory_budget: int | None = None,
+):
+    """
+    With a memory_budget (in bytes) the set of seen states is a BoundedKeySet,
+    which turns into a bloom filter once the budget is reached.
+    """
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+
     prev_marble_count = start_node.board.num_marbles
+    score = get_heuristic(heuristic)
+    rate = _rate(score, tie_break)
+    start_board = start_node.board
 
-    # keep track of all the visited states ie Board
-    closed = set()
-    # queue to store all the states that haven't been visited
-    open = []
-    heapq.heappush(open, start_node)
-    open_set = set([start_node.board])
+    # the expanded part of the search tree
+    arena = NodeArena(totals=True)
+    # canonical keys of every state seen so far, expanded or still in the frontier
+    seen = KeySet() if memory_budget is None else BoundedKeySet(memory_budget)
+    seen.add(start_board.canonical_key())
+    # queue of packed entries, scored once on insertion: the score is the bucket,
+    # and a child board is only built once it is popped, see NodeArena.entry
+    open = BucketQueue(tie_break, packed=True)
+    start_score, start_rank = rate(start_board)
+    open.push(start_score, arena.entry(), start_rank or 0)
 
     while len(open) != 0:
-        parent = heapq.heappop(open)
-        open_set.discard(parent.board)
+        parent = arena.add_entry(open.pop(), start_board)
+        board = arena.board(parent, start_board)
         # remove from the head
-        if parent.board.goal_test() is True:
-            return parent.back_track()
-        else:
-            if prev_marble_count > parent.board.num_marbles:
-                prev_marble_count = parent.board.num_marbles
-                print(f"Marbles left: {parent.board.num_marbles}")
-
-            closed.add(parent.board)
-            children = parent.board.move_gen()
-            # removing already visited states
-            children = [
-                child
-                for child in children
-                if child not in closed and child not in open_set
-            ]
-            for child in children:
-                heapq.heappush(open, Node(child, parent))
-                open_set.add(child)
+        if board.goal_test() is True:
+            return start_node.back_track(arena.back_track(parent, start_board)[:-1])
+
+        won = None if tablebase is None else tablebase.probe(board)
+        if won is True:
+            return start_node.back_track(
+                tablebase.finish(board) + arena.back_track(parent, start_board)[:-1]
+            )
+        elif won is None:
+            if prev_marble_count > board.num_marbles:
+                prev_marble_count = board.num_marbles
+                if memory_budget is None:
+                    print(f"Marbles left: {board.num_marbles}")
+                else:
+                    print(f"Marbles left: {board.num_marbles} | Seen: {seen.report()}")
+
+            depth = arena.depths[parent] + 1
+            for jump, key, (child_score, rank) in board._child_keys(rate):
+                # removing already visited states
+                if key in seen:
+                    continue
+
+                open.push(
+                    child_score,
+                    arena.entry(parent, jump),
+                    depth if rank is None else rank,
+                )
+                seen.add(key)
 
     return None
 
 
 def stepped_best_first_search(
-    node: Node, open: list[Node] | None, open_set: set | None, closed: set
+    node: Node,
+    open: BucketQueue | None,
+    open_set: set | None,
+    closed: set,
+    tie_break: str = "mobility",
+    heuristic: str = "corners",
 ):
+    score = get_heuristic(heuristic)
+    rate = _rate(score, tie_break)
 
     if open is None and open_set is None:
-        open = []
-        heapq.heappush(open, node)
-        open_set = set([node.board])
+        open = BucketQueue(tie_break)
+        node.score, rank = rate(node.board)
+        open.push(node.score, node, node.depth if rank is None else rank)
+        # same kind of set as the closed set the caller keeps
+        open_set = type(closed)([node.board.canonical_key()])
 
-    parent = heapq.heappop(open)
-    open_set.discard(parent.board)
+    parent = open.pop()
+    open_set.discard(parent.board.canonical_key())
 
     if parent.board.goal_test():
         return True, parent, open, open_set, closed
     else:
 
-        closed.add(parent.board)
-        children: list = parent.board.move_gen()
-
-        children = [
-            child for child in children if child not in closed and child not in open_set
-        ]
+        closed.add(parent.board.canonical_key())
+        for child in parent.board.move_gen():
+            # removing already visited states, and siblings which are symmetric images of each other
+            key = child.canonical_key()
+            if key in closed or key in open_set:
+                continue
 
-        for child in children:
-            heapq.heappush(open, Node(child, parent))
-            open_set.add(child)
+            child_score, rank = rate(child)
+            child_node = Node(child, parent, child_score)
+            open.push(
+                child_node.score,
+                child_node,
+                child_node.depth if rank is None else rank,
+            )
+            open_set.add(key)
 
         return False, parent, open, open_set, closed
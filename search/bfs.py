@@ -1,42 +1,166 @@
 import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from itertools import groupby
 from typing import Deque
 from collections import deque
+from contextlib import ExitStack
+import batch
 from search._node import Node
+from search._arena import NodeArena
+from search.tablebase import Tablebase
+from search.keyset import KeySet
 
 
-def bread_first_search(start_node: Node):
+def bread_first_search(start_node: Node, tablebase: Tablebase | None = None):
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+
     prev_marble_count = start_node.board.num_marbles
+    start_board = start_node.board
 
-    # keep track of all the visited states ie Board
-    closed = set()
-    # queue to store all the states that haven't been visited
-    open = deque()
-    open.append(start_node)
-    open_set = set([start_node.board])
+    # the expanded part of the search tree
+    arena = NodeArena()
+    # canonical keys of every state seen so far, expanded or still in the frontier
+    seen = KeySet([start_board.canonical_key()])
+    # the frontier, one layer at a time, holds packed entries: a child board is only
+    # built once it is popped, see NodeArena.entry
+    open = array("Q", [arena.entry()])
     while len(open) != 0:
-        # remove from the head
-        parent = open.popleft()
-        open_set.discard(parent.board)
-        
-        if parent.board.goal_test() is True:
-            return parent.back_track()
-        else:
-            if prev_marble_count > parent.board.num_marbles:
-                prev_marble_count = parent.board.num_marbles
-                print(f"Marbles left: {parent.board.num_marbles}")
-
-            closed.add(parent.board)
-            children = parent.board.move_gen()
-            # removing already visited states
-            children = [
-                child
-                for child in children
-                if child not in closed and child not in open_set
-            ]
+        next_open = array("Q")
+        for entry in open:
+            parent = arena.add_entry(entry, start_board)
+            board = arena.board(parent, start_board)
+
+            if board.goal_test() is True:
+                return start_node.back_track(arena.back_track(parent, start_board)[:-1])
+
+            won = None if tablebase is None else tablebase.probe(board)
+            if won is True:
+                return start_node.back_track(
+                    tablebase.finish(board) + arena.back_track(parent, start_board)[:-1]
+                )
+            elif won is None:
+                if prev_marble_count > board.num_marbles:
+                    prev_marble_count = board.num_marbles
+                    print(f"Marbles left: {board.num_marbles}")
+
+                for jump, key, _ in board._child_keys():
+                    # removing already visited states
+                    if key in seen:
+                        continue
+
+                    next_open.append(arena.entry(parent, jump))
+                    seen.add(key)
+        open = next_open
+
+
+def _sorted_unique(keys: array) -> array:
+    """
+    Deduplicates a whole layer of canonical keys at once
+    """
+    return array("Q", (key for key, _ in groupby(sorted(keys))))
+
+
+def _contains(layer: array, key: int) -> bool:
+    index = bisect_left(layer, key)
+    return index < len(layer) and layer[index] == key
+
+
+def layered_bread_first_search(start_node: Node, scratch_dir: str | None = None):
+    """
+    Breadth first search one layer at a time. Every move removes exactly one marble,
+    so a state can only be reached again from the layer right above it: there is no
+    global closed set, each layer is deduplicated in bulk and kept as a sorted array
+    of canonical keys, 8 bytes a state.
+    Only the layer being expanded stays in memory, the finished ones are written to a
+    temporary directory (in scratch_dir if given) and mapped back to recover the path.
+    """
+    # external builds on this module, so it is only imported once both are loaded
+    from search.external import _layer_file, _mapped, _write_keys
+
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
 
-            for child in children:
-                open.append(Node(child, parent))
-                open_set.add(child)
+    start_board = start_node.board
+    layer = array("Q", [start_board.canonical_key()])
+    depth = 0
+
+    with tempfile.TemporaryDirectory(
+        prefix="bfs-layers-", dir=scratch_dir
+    ) as directory:
+        while len(layer) != 0:
+            marbles = start_board.num_marbles - depth
+            print(f"Marbles left: {marbles} | States: {len(layer)}")
+
+            for key in layer if marbles == 1 else ():
+                if start_board._spawn(key).goal_test() is True:
+                    with ExitStack() as stack:
+                        layers = [
+                            stack.enter_context(_mapped(_layer_file(directory, i)))
+                            for i in range(depth)
+                        ]
+                        return start_node.back_track(
+                            _layered_path(start_board, layers + [layer], key)[:-1]
+                        )
+
+            _write_keys(_layer_file(directory, depth), layer)
+            depth += 1
+            layer = _child_layer(layer, start_board)
+
+    return None
+
+
+def _child_layer(layer: array, board) -> array:
+    """
+    Returns the sorted canonical keys of the children of a layer of canonical keys,
+    board is any board with the same holes
+    """
+    if batch.AVAILABLE:
+        # the whole layer in a few vectorised passes
+        return batch.expand(layer, board._holes)
+
+    keys = array("Q")
+    for key in layer:
+        for child in board._spawn(key).move_gen():
+            keys.append(child.canonical_key())
+    # the children only need the current layer, the buffer is released on return
+    return _sorted_unique(keys)
+
+
+def _layered_path(start_board, layers: list[array], key: int) -> list:
+    """
+    Walks back from the goal key through the layers to find the keys of a solution,
+    then replays it forward from the start board. Returns the boards from the goal up to the start.
+    """
+    keys = [key]
+    for layer in reversed(layers[:-1]):
+        for parent in start_board._spawn(key)._parents():
+            if _contains(layer, parent.canonical_key()):
+                key = parent.canonical_key()
+                break
+        keys.append(key)
+    return _replay_keys(start_board, keys)
+
+
+def _replay_keys(start_board, keys: list[int]) -> list:
+    """
+    Replays a path given by canonical keys, from the goal up to the start, on the
+    real orientation of the start board. Returns the boards in the same order.
+    """
+    sequence = [start_board]
+    for key in reversed(keys[:-1]):
+        sequence.append(
+            next(
+                child
+                for child in sequence[-1].move_gen()
+                if child.canonical_key() == key
+            )
+        )
+    return sequence[::-1]
 
 
 def stepped_bread_first_search(
@@ -44,26 +168,30 @@ def stepped_bread_first_search(
 ):
 
     if open is None and open_set is None:
-        open_set = set([node.board])
+        # same kind of set as the closed set the caller keeps
+        open_set = type(closed)([node.board.canonical_key()])
         open = deque()
         open.append(node)
 
     parent = open.popleft()
-    open_set.discard(parent.board)
+    open_set.discard(parent.board.canonical_key())
 
     if parent.board.goal_test():
         return True, parent, open, open_set, closed
     else:
 
-        closed.add(parent.board)
+        closed.add(parent.board.canonical_key())
         children: list = parent.board.move_gen()
 
         children = [
-            child for child in children if child not in closed and child not in open_set
+            child
+            for child in children
+            if child.canonical_key() not in closed
+            and child.canonical_key() not in open_set
         ]
 
         for child in children:
             open.append(Node(child, parent))
-            open_set.add(child)
+            open_set.add(child.canonical_key())
 
         return False, parent, open, open_set, closed
@@ -0,0 +1,120 @@
+import os
+import tempfile
+from array import array
+from contextlib import ExitStack
+import batch
+import bitboard
+from search._node import Node
+from search.bfs import _child_layer, _contains, _layered_path
+from search.external import _layer_file, _mapped, _write_keys
+from search.tablebase import _parent_layer
+
+
+def _intersect(first: array, second: array) -> array:
+    """
+    Returns the keys found in both of two sorted, deduplicated arrays of keys
+    """
+    if batch.AVAILABLE:
+        return batch.intersect(first, second)
+
+    common = array("Q")
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if first[i] < second[j]:
+            i += 1
+        elif first[i] > second[j]:
+            j += 1
+        else:
+            common.append(first[i])
+            i += 1
+            j += 1
+    return common
+
+
+def _finish(board, layers: dict) -> list:
+    """
+    Walks down from a winnable board to the goal through the backward layers, indexed by
+    their number of marbles. Returns the boards after board, in the order back_track returns them.
+    """
+    sequence = []
+    while not board.goal_test():
+        layer = layers[board.num_marbles - 1]
+        board = next(
+            child
+            for child in board.move_gen()
+            if _contains(layer, child.canonical_key())
+        )
+        sequence.append(board)
+    return sequence[::-1]
+
+
+def bidirectional_search(
+    start_node: Node, meet_at: int | None = None, scratch_dir: str | None = None
+):
+    """
+    Searches forward from the start and backward from the goal, with reverse jumps,
+    until both sides hold the boards with the same number of marbles, then intersects
+    those two layers. Each side is a layered breadth first search over sorted arrays
+    of canonical keys. By default the side with the smaller layer grows next, which
+    balances the two; meet_at fixes the number of marbles they meet at instead.
+    Only the two frontiers stay in memory, the finished layers are written to a
+    temporary directory (in scratch_dir if given) for the path recovery.
+    """
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+
+    start_board = start_node.board
+    if meet_at is not None:
+        meet_at = max(1, min(meet_at, start_board.num_marbles))
+
+    # the two frontiers, and their number of marbles
+    forward = array("Q", [start_board.canonical_key()])
+    high = start_board.num_marbles
+    backward = array("Q", [start_board._spawn(bitboard.CENTER_BIT).canonical_key()])
+    low = 1
+
+    with tempfile.TemporaryDirectory(
+        prefix="bidirectional-", dir=scratch_dir
+    ) as directory:
+        forward_dir = os.path.join(directory, "forward")
+        backward_dir = os.path.join(directory, "backward")
+        os.mkdir(forward_dir)
+        os.mkdir(backward_dir)
+
+        while high > low and len(forward) != 0 and len(backward) != 0:
+            if meet_at is None:
+                grow_forward = len(forward) <= len(backward)
+            else:
+                grow_forward = high > meet_at
+            if grow_forward:
+                print(f"Forward: Marbles left: {high} | States: {len(forward)}")
+                _write_keys(_layer_file(forward_dir, high), forward)
+                forward = _child_layer(forward, start_board)
+                high -= 1
+            else:
+                print(f"Backward: Marbles left: {low} | States: {len(backward)}")
+                _write_keys(_layer_file(backward_dir, low), backward)
+                backward = _parent_layer(backward, start_board)
+                low += 1
+
+        common = _intersect(forward, backward)
+        print(f"Meeting at {high} marbles: {len(common)} boards on both sides")
+        if len(common) == 0:
+            return None
+
+        with ExitStack() as stack:
+            forward_layers = [
+                stack.enter_context(_mapped(_layer_file(forward_dir, marbles)))
+                for marbles in range(start_board.num_marbles, high, -1)
+            ]
+            sequence = _layered_path(start_board, forward_layers + [forward], common[0])
+            backward_layers = {
+                marbles: stack.enter_context(
+                    _mapped(_layer_file(backward_dir, marbles))
+                )
+                for marbles in range(1, high)
+            }
+            return start_node.back_track(
+                _finish(sequence[0], backward_layers) + sequence[:-1]
+            )
@@ -0,0 +1,155 @@
+import math
+from search.keyset import KeySet
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_WORD = (1 << 64) - 1
+_MAGIC = b"BVBLOOM\0"
+
+
+class BloomFilter:
+    """
+    Fixed size probabilistic set of 64 bit keys. A key which was added is always
+    found, a key which was not may be found too, with the rate given by
+    false_positive_rate. Keys can not be removed.
+    """
+
+    def __init__(self, nbytes: int, hashes: int = 7):
+        self._bits = bytearray(max(1, nbytes))
+        self._size = 8 * len(self._bits)
+        self.hashes = hashes
+        # keys added, and bits set, for the false positive estimate
+        self._len = 0
+        self._set = 0
+
+    @classmethod
+    def for_keys(cls, nbytes: int, keys: int):
+        """
+        Returns a filter of nbytes with the number of hashes best suited to the given number of keys
+        """
+        hashes = round(8 * nbytes / max(1, keys) * math.log(2))
+        return cls(nbytes, min(max(1, hashes), 16))
+
+    def _positions(self, key: int):
+        # double hashing: the two halves of one multiplicative hash give the probe sequence
+        mixed = key * _GOLDEN
+        first = (mixed >> 64) & _WORD
+        step = (mixed & _WORD) | 1
+        for i in range(self.hashes):
+            yield (first + i * step) % self._size
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, key: int) -> bool:
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    def add(self, key: int):
+        bits = self._bits
+        new = False
+        for position in self._positions(key):
+            byte = bits[position >> 3]
+            bit = 1 << (position & 7)
+            if not byte & bit:
+                bits[position >> 3] = byte | bit
+                self._set += 1
+                new = True
+        # a key whose bits were all set already is counted as seen before
+        self._len += new
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def contains_many(self, keys) -> list[bool]:
+        return [key in self for key in keys]
+
+    def false_positive_rate(self) -> float:
+        """
+        Returns the chance that a key never added is reported as present, from the fraction of bits set
+        """
+        return (self._set / self._size) ** self.hashes
+
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialises the filter, see from_bytes
+        """
+        header = b"".join(
+            value.to_bytes(8, "little") for value in (self.hashes, self._len, self._set)
+        )
+        return _MAGIC + header + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        if data[:8] != _MAGIC:
+            raise ValueError("Not a serialised bloom filter")
+        hashes, length, set_bits = (
+            int.from_bytes(data[offset : offset + 8], "little")
+            for offset in (8, 16, 24)
+        )
+        bloom = cls(len(data) - 32, hashes)
+        bloom._bits[:] = data[32:]
+        bloom._len = length
+        bloom._set = set_bits
+        return bloom
+
+
+class BoundedKeySet:
+    """
+    Closed set kept under a memory budget in bytes. Keys are held exactly in a KeySet
+    until its table outgrows the budget, then in a BloomFilter of the budget: the
+    search may from then on skip a state it never saw, at the reported rate.
+    """
+
+    def __init__(self, memory_budget: int, keys=()):
+        self.memory_budget = memory_budget
+        self._keys: KeySet | BloomFilter = KeySet()
+        self.update(keys)
+
+    @property
+    def exact(self) -> bool:
+        return isinstance(self._keys, KeySet)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._keys
+
+    def add(self, key: int):
+        self._keys.add(key)
+        if self.exact and self._keys.nbytes() > self.memory_budget:
+            # sized for the search to go on for as long again
+            bloom = BloomFilter.for_keys(self.memory_budget, 2 * len(self._keys))
+            bloom.update(self._keys)
+            print(
+                f"Memory budget reached at {len(self._keys)} states, switching to a bloom filter"
+            )
+            self._keys = bloom
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def contains_many(self, keys) -> list[bool]:
+        return [key in self for key in keys]
+
+    def nbytes(self) -> int:
+        return self._keys.nbytes()
+
+    def false_positive_rate(self) -> float:
+        return 0.0 if self.exact else self._keys.false_positive_rate()
+
+    def report(self) -> str:
+        """
+        Describes the set for progress messages
+        """
+        if self.exact:
+            return f"exact, {len(self)} states"
+        return f"bloom filter, {len(self)} states, {self.false_positive_rate():.2e} estimated false positives"
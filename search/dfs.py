@@ -1,58 +1,147 @@
 import copy
 import time
+import winnability
+from typing import Iterator
 from search._node import Node
+from search._cache import DeadStateCache
+from search.bloom import BoundedKeySet
+from search.tablebase import Tablebase
+from search.heuristics import get_move_order
+
+
+def dhokla_first_search(
+    start_node: Node,
+    max_dead_states: int = 1_000_000,
+    tablebase: Tablebase | None = None,
+    memory_budget: int | None = None,
+    move_order: str = "reverse",
+):
+    """
+    Depth first search on a single board, walked in place with make and unmake
+    of jumps, which remembers the states it proved to be dead ends in a cache
+    holding at most max_dead_states canonical keys.
+    The jumps of a board are generated lazily in move_order (see get_move_order),
+    and a child is only checked for dead ends when the search reaches it.
+    With a memory_budget (in bytes) the dead ends are kept in a BoundedKeySet
+    instead, which turns into a bloom filter once the budget is reached.
+    Once few enough marbles are left, the tablebase (if any) finishes the search.
+    """
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+    if start_node.board.goal_test():
+        return start_node.back_track()
+    if tablebase is not None and tablebase.probe(start_node.board) is False:
+        return None
 
-
-def dhokla_first_search(start_node: Node):
     prev_marble_count = start_node.board.num_marbles
 
-    open: list[Node] = [start_node]
-    closed: set = set()
+    if memory_budget is None:
+        dead = DeadStateCache(max_dead_states)
+    else:
+        dead = BoundedKeySet(memory_budget)
+    order = get_move_order(move_order)
+    board = start_node.board.copy()
+    database = winnability.DATABASE
+    if database is not None and not database.covers(board):
+        database = None
+    # jumps made so far, and per level the jumps left to try
+    path: list[int] = []
+    open: list[Iterator[int]] = [board._jumps(order)]
 
     while open != []:
-        parent = open.pop()
-        if parent.board.goal_test():
-            return parent.back_track()
-        else:
-            if prev_marble_count > parent.board.num_marbles:
-                prev_marble_count = parent.board.num_marbles
-                print(f"Marbles left: {parent.board.num_marbles}")
-
-            closed.add(parent.board)
-            children: list = parent.board.move_gen()
+        jump = next(open[-1], -1)
+        if jump < 0:
+            # every child failed, so this state is a dead end
+            dead.add(board.canonical_key())
+            open.pop()
+            if path:
+                board._undo_jump(path.pop())
+            continue
+
+        board._apply_jump(jump)
+        if board.goal_test():
+            path.append(jump)
+            return _replay(start_node, path)
+        won = None if tablebase is None else tablebase.probe(board)
+        if won is True:
+            path.append(jump)
+            return tablebase.finish(board) + _replay(start_node, path)
+        if won is False or board.canonical_key() in dead:
+            board._undo_jump(jump)
+            continue
+        # drop losing boards outright when the database knows them, else the ones without moves
+        if database is not None:
+            if not database.is_winnable(board):
+                board._undo_jump(jump)
+                continue
+        elif not board.solvable():
+            board._undo_jump(jump)
+            continue
+
+        if prev_marble_count > board.num_marbles:
+            prev_marble_count = board.num_marbles
+            if memory_budget is None:
+                print(f"Marbles left: {board.num_marbles}")
+            else:
+                print(f"Marbles left: {board.num_marbles} | Dead ends: {dead.report()}")
+
+        path.append(jump)
+        open.append(board._jumps(order))
 
-            children = [child for child in children if child not in closed]
+    return None
 
-            for child in children:
-                open.append(Node(child, parent))
 
-    return None
+def _replay(start_node: Node, path: list[int]) -> list:
+    """
+    Rebuilds the boards along a path of jumps, in the order back_track returns them
+    """
+    node = start_node
+    for jump in path:
+        board = node.board.copy()
+        board._apply_jump(jump)
+        node = Node(board, node)
+    return node.back_track()
 
 
 def stepped_dhokla_first_search(
-    node: Node, open: list[Node] | None, open_set: set | None, closed: set
+    node: Node,
+    open: list | None,
+    open_set: set | None,
+    closed: set,
+    move_order: str = "reverse",
 ):
+    """
+    Expands one node per call. `open` is the stack of the current path, one
+    (node, children left) frame per level, and `open_set` the canonical keys on
+    it. The children of a node are generated lazily, in move_order, so only
+    those the search gets to are built.
+    """
 
     if open is None and open_set is None:
-        open_set = set([node.board])
-        open = [node]
-
-    parent = open.pop()
-    open_set.discard(parent.board)
-
-    if parent.board.goal_test():
-        return True, parent, open, open_set, closed
-    else:
-
-        closed.add(parent.board)
-        children: list = parent.board.move_gen()
-
-        children = [
-            child for child in children if child not in closed and child not in open_set
-        ]
-
-        for child in children:
-            open.append(Node(child, parent))
-            open_set.add(child)
-
-        return False, parent, open, open_set, closed
+        # same kind of set as the closed set the caller keeps
+        open_set = type(closed)([node.board.canonical_key()])
+        open = [(node, None)]
+
+    order = get_move_order(move_order)
+    while True:
+        parent, children = open[-1]
+        if children is None:
+            if parent.board.goal_test():
+                return True, parent, open, open_set, closed
+
+            closed.add(parent.board.canonical_key())
+            open[-1] = (parent, parent.board.successors(order))
+            return False, parent, open, open_set, closed
+
+        child = next(children, None)
+        if child is None:
+            open.pop()
+            open_set.discard(parent.board.canonical_key())
+            continue
+
+        if child.canonical_key() in closed or child.canonical_key() in open_set:
+            continue
+
+        open.append((Node(child, parent), None))
+        open_set.add(child.canonical_key())
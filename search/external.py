@@ -0,0 +1,224 @@
+import errno
+import heapq
+import json
+import mmap
+import os
+from array import array
+from contextlib import ExitStack, contextmanager
+from itertools import groupby
+from search._node import Node
+from search.bfs import _layered_path
+
+# a key costs 8 bytes in the buffer, but sorting it makes a list entry and an int object
+_BYTES_PER_KEY = 48
+# number of keys written to disk at once while merging
+_WRITE_CHUNK = 1 << 16
+_MANIFEST = "manifest.json"
+
+
+def _layer_file(scratch_dir: str, depth: int) -> str:
+    return os.path.join(scratch_dir, f"layer-{depth:03d}.bin")
+
+
+def _run_file(scratch_dir: str, depth: int, run: int) -> str:
+    return os.path.join(scratch_dir, f"run-{depth:03d}-{run:05d}.bin")
+
+
+@contextmanager
+def _mapped(path: str):
+    """
+    Memory maps a file of keys and yields it as a sequence of ints
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield array("Q")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            keys = memoryview(mapped).cast("Q")
+            try:
+                yield keys
+            finally:
+                keys.release()
+
+
+def _reserve(scratch_dir: str, nbytes: int, disk_limit: int | None):
+    """
+    Raises if writing nbytes more to the scratch directory would go over the disk limit
+    """
+    if disk_limit is None:
+        return
+    used = sum(entry.stat().st_size for entry in os.scandir(scratch_dir))
+    if used + nbytes > disk_limit:
+        raise OSError(
+            errno.ENOSPC,
+            f"External BFS needs {used + nbytes} bytes of scratch space, the limit is {disk_limit}",
+        )
+
+
+def _write_keys(path: str, keys):
+    """
+    Writes keys to a temporary file and moves it in place, a file either exists whole or not at all
+    """
+    with open(path + ".tmp", "wb") as f:
+        buffer = array("Q")
+        for key in keys:
+            buffer.append(key)
+            if len(buffer) == _WRITE_CHUNK:
+                buffer.tofile(f)
+                buffer = array("Q")
+        buffer.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def _save_manifest(scratch_dir: str, manifest: dict):
+    path = os.path.join(scratch_dir, _MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def _load_manifest(scratch_dir: str, start_board) -> dict | None:
+    """
+    Returns the progress saved in the scratch directory for the same start board, if any,
+    and removes the files a crash may have left behind
+    """
+    try:
+        with open(os.path.join(scratch_dir, _MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if (
+        manifest["holes"] != start_board._holes
+        or manifest["start"] != start_board._pegs
+    ):
+        raise ValueError(
+            f"{scratch_dir} holds the search of another board, use an empty scratch directory"
+        )
+
+    keep = {_MANIFEST} | set(manifest["runs"])
+    keep |= {
+        os.path.basename(_layer_file(scratch_dir, depth))
+        for depth in range(len(manifest["layers"]))
+    }
+    for entry in os.scandir(scratch_dir):
+        if entry.name not in keep:
+            os.remove(entry.path)
+    return manifest
+
+
+def _merge_runs(
+    scratch_dir: str, runs: list[str], path: str, disk_limit: int | None
+) -> int:
+    """
+    Merges sorted runs into a single deduplicated file, returns the number of keys written
+    """
+    paths = [os.path.join(scratch_dir, run) for run in runs]
+    # at worst there are no duplicates at all
+    _reserve(scratch_dir, sum(os.path.getsize(run) for run in paths), disk_limit)
+
+    count = 0
+
+    def unique(keys):
+        nonlocal count
+        for key, _ in groupby(keys):
+            count += 1
+            yield key
+
+    with ExitStack() as stack:
+        views = [stack.enter_context(_mapped(run)) for run in paths]
+        _write_keys(path, unique(heapq.merge(*views)))
+    return count
+
+
+def external_bread_first_search(
+    start_node: Node,
+    scratch_dir: str = "bfs-scratch",
+    ram_limit: int = 512 * 2**20,
+    disk_limit: int | None = None,
+):
+    """
+    Layered breadth first search with the layers on disk. The children of a layer are
+    collected in memory up to ram_limit bytes, then sorted and written as a run; once the
+    layer is expanded the runs are merged and deduplicated into the next layer.
+    Progress is saved in the scratch directory, calling again with the same start board
+    resumes after the last run written.
+    """
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+
+    start_board = start_node.board
+    os.makedirs(scratch_dir, exist_ok=True)
+    manifest = _load_manifest(scratch_dir, start_board)
+    if manifest is None:
+        _write_keys(_layer_file(scratch_dir, 0), [start_board.canonical_key()])
+        manifest = {
+            "holes": start_board._holes,
+            "start": start_board._pegs,
+            # number of states of every layer merged so far
+            "layers": [1],
+            # runs written for the next layer, and how much of the last layer they cover
+            "runs": [],
+            "expanded": 0,
+        }
+        _save_manifest(scratch_dir, manifest)
+    else:
+        print(f"Resuming from {scratch_dir}")
+
+    buffer_size = max(1, ram_limit // _BYTES_PER_KEY)
+
+    def flush(keys: array, expanded: int):
+        depth = len(manifest["layers"])
+        path = _run_file(scratch_dir, depth, len(manifest["runs"]))
+        _reserve(scratch_dir, keys.itemsize * len(keys), disk_limit)
+        _write_keys(path, (key for key, _ in groupby(sorted(keys))))
+        manifest["runs"].append(os.path.basename(path))
+        manifest["expanded"] = expanded
+        _save_manifest(scratch_dir, manifest)
+
+    while manifest["layers"][-1] != 0:
+        depth = len(manifest["layers"]) - 1
+        marbles = start_board.num_marbles - depth
+        print(f"Marbles left: {marbles} | States: {manifest['layers'][-1]}")
+
+        with _mapped(_layer_file(scratch_dir, depth)) as layer:
+            for key in layer if marbles == 1 else ():
+                if start_board._spawn(key).goal_test() is True:
+                    with ExitStack() as stack:
+                        layers = [
+                            stack.enter_context(_mapped(_layer_file(scratch_dir, i)))
+                            for i in range(depth + 1)
+                        ]
+                        sequence = _layered_path(start_board, layers, key)
+                    return start_node.back_track(sequence[:-1])
+
+            keys = array("Q")
+            for position in range(manifest["expanded"], len(layer)):
+                for child in start_board._spawn(layer[position]).move_gen():
+                    keys.append(child.canonical_key())
+                if len(keys) >= buffer_size:
+                    flush(keys, position + 1)
+                    keys = array("Q")
+            if len(keys) != 0:
+                flush(keys, len(layer))
+
+        count = _merge_runs(
+            scratch_dir,
+            manifest["runs"],
+            _layer_file(scratch_dir, depth + 1),
+            disk_limit,
+        )
+        runs = manifest["runs"]
+        manifest["layers"].append(count)
+        manifest["runs"] = []
+        manifest["expanded"] = 0
+        _save_manifest(scratch_dir, manifest)
+        for run in runs:
+            os.remove(os.path.join(scratch_dir, run))
+
+    return None
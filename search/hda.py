@@ -0,0 +1,322 @@
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from search._bucket import BucketQueue
+from search._node import Node
+from search.bfs import _replay_keys
+from search.heuristics import get_heuristic
+from search.parallel import _board
+
+# seconds between two termination probes of the coordinator
+_PROBE_INTERVAL = 0.05
+# seconds a socket endpoint waits for a peer to start listening
+_CONNECT_TIMEOUT = 30
+
+
+def _owner(key: int, workers: int) -> int:
+    """
+    Returns the worker owning a canonical key. The low bits of a key are cells
+    outside the holes, so the key is mixed before taking the modulo.
+    """
+    return (((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) % workers
+
+
+class QueueTransport:
+    """
+    Messages between the processes of one machine, one multiprocessing queue per endpoint.
+    Endpoint i < workers is a worker, endpoint workers is the coordinator.
+    """
+
+    def __init__(self, workers: int):
+        self._inboxes = [multiprocessing.Queue() for _ in range(workers + 1)]
+
+    def open(self, endpoint: int):
+        self._endpoint = endpoint
+
+    def send(self, endpoint: int, message: tuple):
+        self._inboxes[endpoint].put(message)
+
+    def receive(self, timeout: float | None) -> tuple | None:
+        try:
+            return self._inboxes[self._endpoint].get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        # unread messages are dropped instead of blocking the exit of the process
+        for inbox in self._inboxes:
+            inbox.cancel_join_thread()
+
+
+class SocketTransport:
+    """
+    Messages over multiprocessing.connection sockets, one listening address per endpoint.
+    With (host, port) addresses the workers can run on different hosts: those left out
+    of the local_workers of hda_star_search are started there with `hda_worker` and
+    the same list of addresses and authkey.
+    """
+
+    def __init__(self, addresses: list, authkey: bytes = b"brainvita"):
+        self.addresses = addresses
+        self.authkey = authkey
+        # the temporary directory of the addresses made by local
+        self._directory = None
+
+    @classmethod
+    def local(cls, workers: int):
+        """
+        Unix socket addresses for the endpoints of a single host
+        """
+        directory = tempfile.mkdtemp(prefix="hda-")
+        transport = cls([os.path.join(directory, str(i)) for i in range(workers + 1)])
+        transport._directory = directory
+        return transport
+
+    def open(self, endpoint: int):
+        self._inbox = queue.Queue()
+        self._connections = {}
+        self._listener = Listener(self.addresses[endpoint], authkey=self.authkey)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._read, args=(connection,), daemon=True).start()
+
+    def _read(self, connection):
+        while True:
+            try:
+                self._inbox.put(connection.recv())
+            except (EOFError, OSError):
+                return
+
+    def send(self, endpoint: int, message: tuple):
+        if endpoint not in self._connections:
+            deadline = time.monotonic() + _CONNECT_TIMEOUT
+            while True:
+                try:
+                    self._connections[endpoint] = Client(
+                        self.addresses[endpoint], authkey=self.authkey
+                    )
+                    break
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # the peer is not listening yet
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.01)
+        self._connections[endpoint].send(message)
+
+    def receive(self, timeout: float | None) -> tuple | None:
+        try:
+            return self._inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        for connection in self._connections.values():
+            connection.close()
+        self._listener.close()
+        if self._directory is not None:
+            # closing the listener removed its socket, the last endpoint to close removes the directory
+            try:
+                os.rmdir(self._directory)
+            except OSError:
+                pass
+
+
+def hda_worker(
+    index: int,
+    workers: int,
+    transport,
+    board_type: type,
+    holes: int,
+    heuristic: str = "corners",
+    tie_break: str = "fifo",
+    batch_size: int = 64,
+):
+    """
+    Best first search over the boards owned by one worker. Children owned by other
+    workers are sent to them in batches of (key, parent key) pairs.
+    """
+    transport.open(index)
+    coordinator = workers
+    template = _board(board_type, holes, 0)
+    score = get_heuristic(heuristic)
+
+    open = BucketQueue(tie_break)
+    # parent key of every board this worker owns and has seen, ie its open and closed set
+    parents: dict[int, int] = {}
+    outgoing: list[list[tuple[int, int]]] = [[] for _ in range(workers)]
+    # batches of boards sent to and received from other workers, for termination detection
+    sent = received = 0
+
+    def flush(owner: int):
+        nonlocal sent
+        if outgoing[owner]:
+            transport.send(owner, ("boards", outgoing[owner]))
+            outgoing[owner] = []
+            sent += 1
+
+    def insert(board, key: int, parent_key: int):
+        if key not in parents:
+            parents[key] = parent_key
+            open.push(score(board), board)
+
+    while True:
+        # wait for work when there is nothing to expand
+        message = transport.receive(None if len(open) == 0 else 0)
+        while message is not None:
+            if message[0] == "boards":
+                received += 1
+                for key, parent_key in message[1]:
+                    if key not in parents:
+                        # only build a board for the keys seen for the first time
+                        insert(template._spawn(key), key, parent_key)
+            elif message[0] == "probe":
+                transport.send(
+                    coordinator,
+                    ("counts", message[1], index, len(open) == 0, sent, received),
+                )
+            elif message[0] == "parent":
+                transport.send(coordinator, ("parent", message[1], parents[message[1]]))
+            elif message[0] == "stop":
+                transport.close()
+                return
+            message = transport.receive(0)
+
+        for _ in range(batch_size):
+            if len(open) == 0:
+                break
+            board = open.pop()
+            key = board.canonical_key()
+            if board.goal_test() is True:
+                transport.send(coordinator, ("solved", key))
+                continue
+
+            for child in board.move_gen():
+                child_key = child.canonical_key()
+                owner = _owner(child_key, workers)
+                if owner == index:
+                    insert(child, child_key, key)
+                else:
+                    outgoing[owner].append((child_key, key))
+                    if len(outgoing[owner]) >= batch_size:
+                        flush(owner)
+
+        # do not hold back boards while the other workers may be waiting for them
+        for owner in range(workers):
+            flush(owner)
+
+
+def hda_star_search(
+    start_node: Node,
+    workers: int | None = None,
+    heuristic: str = "corners",
+    tie_break: str = "fifo",
+    batch_size: int = 64,
+    transport=None,
+    local_workers: list[int] | None = None,
+):
+    """
+    Hash distributed best first search: every canonical board is owned by one worker,
+    picked by a hash of its key, and only that worker keeps it in its open and closed
+    sets, so duplicates are detected exactly across processes.
+    The search ends when a worker expands the goal, or when every worker is idle and
+    every batch sent has been received, the same in two probes in a row.
+    Only the workers in local_workers (default: all of them) are started here, the
+    others must be started with `hda_worker` on the hosts of a SocketTransport.
+    """
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+
+    start_board = start_node.board
+    workers = workers or os.cpu_count()
+    if transport is None:
+        transport = QueueTransport(workers)
+    if local_workers is None:
+        local_workers = range(workers)
+
+    processes = [
+        multiprocessing.Process(
+            target=hda_worker,
+            args=(
+                index,
+                workers,
+                transport,
+                type(start_board),
+                start_board._holes,
+                heuristic,
+                tie_break,
+                batch_size,
+            ),
+            daemon=True,
+        )
+        for index in local_workers
+    ]
+    for process in processes:
+        process.start()
+    transport.open(workers)
+
+    try:
+        start_key = start_board.canonical_key()
+        transport.send(_owner(start_key, workers), ("boards", [(start_key, -1)]))
+
+        goal = None
+        wave = 0
+        replies = {}
+        previous = None
+        next_probe = time.monotonic()
+        while goal is None:
+            if next_probe is not None and time.monotonic() >= next_probe:
+                for index in range(workers):
+                    transport.send(index, ("probe", wave))
+                next_probe = None
+
+            message = transport.receive(_PROBE_INTERVAL)
+            if message is None:
+                continue
+            if message[0] == "solved":
+                goal = message[1]
+            elif message[0] == "counts" and message[1] == wave:
+                replies[message[2]] = message[3:]
+                if len(replies) == workers:
+                    snapshot = [replies[index] for index in range(workers)]
+                    idle = all(reply[0] for reply in snapshot)
+                    # the coordinator sent the batch with the start board
+                    sent = 1 + sum(reply[1] for reply in snapshot)
+                    received = sum(reply[2] for reply in snapshot)
+                    if idle and sent == received and snapshot == previous:
+                        return None
+
+                    previous = snapshot
+                    wave += 1
+                    replies = {}
+                    next_probe = time.monotonic() + _PROBE_INTERVAL
+
+        # walk the parent keys back to the start, asking the owner of each board
+        keys = [goal]
+        while keys[-1] != start_key:
+            transport.send(_owner(keys[-1], workers), ("parent", keys[-1]))
+            message = transport.receive(None)
+            while message[0] != "parent" or message[1] != keys[-1]:
+                message = transport.receive(None)
+            keys.append(message[2])
+
+        print(f"Solved by worker {_owner(goal, workers)} of {workers}")
+        return start_node.back_track(_replay_keys(start_board, keys)[:-1])
+    finally:
+        for index in range(workers):
+            transport.send(index, ("stop",))
+        for process in processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+        transport.close()
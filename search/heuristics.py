@@ -0,0 +1,57 @@
+"""
+Registry of the heuristics the informed solvers can order boards by. Lower scores
+are expanded first, and scores have to be integers (see BucketQueue).
+"""
+
+from typing import Callable
+
+HEURISTICS: dict[str, Callable] = {
+    "corners": lambda board: board._num_corners(),
+    "center": lambda board: board._distance_from_center(),
+    "isolated": lambda board: board._num_isolated(),
+    "mobility": lambda board: board._total_possible_moves(),
+    "marbles": lambda board: board._num_marbles(),
+}
+
+
+def register_heuristic(name: str, function: Callable):
+    """
+    Makes a heuristic (a function of a board returning an int) selectable by name
+    """
+    HEURISTICS[name] = function
+
+
+def get_heuristic(spec: str) -> Callable:
+    """
+    Returns the scoring function for a heuristic name, or for a weighted sum of
+    them such as "2*corners+isolated-mobility"
+    """
+    terms = []
+    for term in spec.replace(" ", "").replace("-", "+-").split("+"):
+        if term == "":
+            continue
+        sign = -1 if term.startswith("-") else 1
+        weight, _, name = term.lstrip("-").rpartition("*")
+        if name not in HEURISTICS:
+            raise ValueError(
+                f"Unknown heuristic {name!r}, choose from {', '.join(HEURISTICS)}"
+            )
+        terms.append((sign * int(weight or 1), HEURISTICS[name]))
+
+    if len(terms) == 1 and terms[0][0] == 1:
+        return terms[0][1]
+    return lambda board: sum(weight * function(board) for weight, function in terms)
+
+
+# orders Board.successors generates moves in without scoring the children
+MOVE_ORDERS = ("index", "reverse", "center")
+
+
+def get_move_order(spec: str):
+    """
+    Returns the order argument of Board.successors for a move order name, or for a
+    heuristic (see get_heuristic) to try the children lowest score first
+    """
+    if spec in MOVE_ORDERS:
+        return spec
+    return get_heuristic(spec)
@@ -0,0 +1,110 @@
+from search._node import Node
+from search._cache import DeadStateCache
+from search.astar import remaining_moves
+
+
+def _bounded_search(start_node: Node, bound: int, dead: DeadStateCache):
+    """
+    Depth first search that never expands a node whose f = g + h exceeds bound.
+    Returns the goal node (or None) and the smallest f that was cut off.
+    A node whose children all failed goes to dead and is skipped when another order
+    of the same jumps reaches it again: every path to a board has the same length,
+    so under this bound it would fail the same way.
+    """
+    next_bound = None
+    # one frame per level of the current path: (node, g, children left to try)
+    stack = [(start_node, 0, None)]
+
+    while stack:
+        parent, cost, children = stack[-1]
+        if children is None:
+            if parent.board.goal_test():
+                return parent, next_bound
+
+            children = parent.board.move_gen()
+            stack[-1] = (parent, cost, children)
+
+        if not children:
+            dead.add(parent.board.canonical_key())
+            stack.pop()
+            continue
+
+        child = Node(children.pop(), parent)
+        if child.board.canonical_key() in dead:
+            continue
+        f = cost + 1 + remaining_moves(child.board)
+        if f > bound:
+            if next_bound is None or f < next_bound:
+                next_bound = f
+            continue
+
+        stack.append((child, cost + 1, None))
+
+    return None, next_bound
+
+
+def ida_star_search(start_node: Node, max_dead_states: int = 1_000_000):
+    """
+    Iterative deepening A*: memory stays linear in the depth of the solution,
+    plus a cache of at most max_dead_states dead ends per iteration.
+    Every jump removes one marble, so f is the same for every node the
+    pagodas let through: the bound never cuts anything and the first iteration
+    already settles the search. The dead ends are what prune it, without them
+    it walks every order of the same jumps.
+    """
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+
+    bound = remaining_moves(start_node.board)
+    while bound is not None:
+        print(f"f bound: {bound}")
+        goal, bound = _bounded_search(
+            start_node, bound, DeadStateCache(max_dead_states)
+        )
+        if goal is not None:
+            return goal.back_track()
+
+    return None
+
+
+def stepped_ida_star_search(
+    node: Node, open: list | None, open_set: set | None, closed: set
+):
+    """
+    Expands one node per call. `open` is the stack of the current path and
+    `open_set` the canonical keys on it, `closed` the keys of the dead ends found
+    so far. The children of a node are generated lazily, as the search gets to them.
+    As in ida_star_search the f bound never cuts anything, so this is the first
+    iteration only: a depth first search pruned by its dead ends.
+    """
+
+    if open is None and open_set is None:
+        open = [(node, None)]
+        # same kind of set as the closed set the caller keeps
+        open_set = type(closed)([node.board.canonical_key()])
+
+    while True:
+        parent, children = open[-1]
+        if children is None:
+            if parent.board.goal_test():
+                return True, parent, open, open_set, closed
+
+            children = parent.board.successors("reverse")
+            open[-1] = (parent, children)
+            return False, parent, open, open_set, closed
+
+        child = next(children, None)
+        if child is None:
+            # every child failed, so this state is a dead end
+            open.pop()
+            open_set.discard(parent.board.canonical_key())
+            closed.add(parent.board.canonical_key())
+            continue
+
+        key = child.canonical_key()
+        if key in closed or key in open_set:
+            continue
+
+        open.append((Node(child, parent), None))
+        open_set.add(key)
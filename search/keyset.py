@@ -0,0 +1,139 @@
+from array import array
+
+# slot markers, no canonical key has all 64 bits set and the key 0 is kept aside
+_EMPTY = 0
+_DELETED = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+class KeySet:
+    """
+    Exact set of 64 bit canonical keys stored in one flat array, with open
+    addressing and linear probing. The table is kept at most half full, so a key
+    costs 16 to 32 bytes against about 70 for an int in a Python set (its
+    table entry and the int object).
+    Supports the parts of the set interface the solvers use.
+    """
+
+    def __init__(self, keys=(), capacity: int = 8):
+        self._slots = array("Q", bytes(8 * self._table_size(capacity)))
+        self._mask = len(self._slots) - 1
+        self._len = 0
+        # slots holding a key or a deletion marker, probes only stop at empty slots
+        self._used = 0
+        self._zero = False
+        self.update(keys)
+
+    @staticmethod
+    def _table_size(keys: int) -> int:
+        # room for keys at a third of the table at most, a full table is rehashed into one twice as large
+        size = 16
+        while size < 3 * keys:
+            size *= 2
+        return size
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        if self._zero:
+            yield 0
+        for slot in self._slots:
+            if slot != _EMPTY and slot != _DELETED:
+                yield slot
+
+    def __contains__(self, key: int) -> bool:
+        if key == 0:
+            return self._zero
+        slots = self._slots
+        mask = self._mask
+        i = (key * _GOLDEN >> 32) & mask
+        while True:
+            slot = slots[i]
+            if slot == key:
+                return True
+            if slot == _EMPTY:
+                return False
+            i = (i + 1) & mask
+
+    def add(self, key: int):
+        if key == 0:
+            if not self._zero:
+                self._zero = True
+                self._len += 1
+            return
+
+        slots = self._slots
+        mask = self._mask
+        i = (key * _GOLDEN >> 32) & mask
+        free = -1
+        while True:
+            slot = slots[i]
+            if slot == key:
+                return
+            if slot == _EMPTY:
+                break
+            if slot == _DELETED and free < 0:
+                free = i
+            i = (i + 1) & mask
+
+        self._len += 1
+        if free >= 0:
+            slots[free] = key
+            return
+        slots[i] = key
+        self._used += 1
+        if 2 * self._used > len(slots):
+            self._rehash()
+
+    def discard(self, key: int):
+        if key == 0:
+            if self._zero:
+                self._zero = False
+                self._len -= 1
+            return
+
+        slots = self._slots
+        mask = self._mask
+        i = (key * _GOLDEN >> 32) & mask
+        while True:
+            slot = slots[i]
+            if slot == key:
+                # the key may sit in the middle of a probe sequence, so it can not be emptied
+                slots[i] = _DELETED
+                self._len -= 1
+                return
+            if slot == _EMPTY:
+                return
+            i = (i + 1) & mask
+
+    def _rehash(self):
+        """
+        Moves every key to a new table, dropping the deletion markers
+        """
+        keys = [slot for slot in self._slots if slot != _EMPTY and slot != _DELETED]
+        self._slots = array("Q", bytes(8 * self._table_size(len(keys))))
+        self._mask = len(self._slots) - 1
+        self._used = 0
+        self._len = int(self._zero)
+        for key in keys:
+            self.add(key)
+
+    def update(self, keys):
+        """
+        Adds every key of an iterable
+        """
+        for key in keys:
+            self.add(key)
+
+    def contains_many(self, keys) -> list[bool]:
+        """
+        Returns, for every key of an iterable, whether it is in the set
+        """
+        return [key in self for key in keys]
+
+    def nbytes(self) -> int:
+        """
+        Returns the size of the table in bytes
+        """
+        return self._slots.itemsize * len(self._slots)
@@ -0,0 +1,125 @@
+import contextlib
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from search._node import Node
+from search.astar import a_star_search
+from search.bestfs import best_first_search
+from search.bfs import bread_first_search
+from search.dfs import dhokla_first_search
+from search.idastar import ida_star_search
+
+# solvers a worker can run, by name so that only a string crosses the process boundary
+SOLVERS = {
+    "bfs": bread_first_search,
+    "dfs": dhokla_first_search,
+    "best": best_first_search,
+    "astar": a_star_search,
+    "idastar": ida_star_search,
+}
+
+
+def _split(start_node: Node, split_depth: int) -> list[Node]:
+    """
+    Expands the root split_depth moves deep, keeping one node per canonical state.
+    Stops early at a goal, which is then the only node returned.
+    """
+    frontier = [start_node]
+    for _ in range(split_depth):
+        children = {}
+        for node in frontier:
+            if node.board.goal_test():
+                return [node]
+            for child in node.board.move_gen():
+                children.setdefault(child.canonical_key(), Node(child, node))
+        if not children:
+            break
+        frontier = list(children.values())
+    return frontier
+
+
+def _board(board_type: type, holes: int, pegs: int):
+    """
+    Rebuilds a board from the ints it crossed the process boundary as
+    """
+    board = board_type()
+    board._holes = holes
+    return board._spawn(pegs)
+
+
+def _solve(
+    board_type: type, holes: int, pegs: int, solver: str, kwargs: dict
+) -> list[int] | None:
+    """
+    Runs a solver in a worker on the board given by its holes and marbles.
+    Returns the marbles of every board of the solution, in back_track order.
+    """
+    board = _board(board_type, holes, pegs)
+    # progress of the workers would interleave on the terminal
+    with contextlib.redirect_stdout(io.StringIO()):
+        sequence = SOLVERS[solver](Node(board), **kwargs)
+    if not sequence:
+        return None
+    return [board._pegs for board in sequence]
+
+
+def _terminate(executor: ProcessPoolExecutor):
+    """
+    Stops the workers still busy on other subproblems, they will never return early by themselves
+    """
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+
+
+def parallel_search(
+    start_node: Node,
+    solver: str = "best",
+    workers: int | None = None,
+    split_depth: int = 2,
+    **kwargs,
+):
+    """
+    Splits the search at split_depth moves from the root and runs the given solver
+    on every distinct subproblem in a pool of worker processes. The first solution
+    found is returned, and the other workers are terminated.
+    """
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+
+    start_board = start_node.board
+    subproblems = _split(start_node, split_depth)
+    print(f"Subproblems: {len(subproblems)} at depth {subproblems[0].depth}")
+
+    executor = ProcessPoolExecutor(workers or os.cpu_count())
+    try:
+        futures = {
+            executor.submit(
+                _solve,
+                type(start_board),
+                start_board._holes,
+                node.board._pegs,
+                solver,
+                kwargs,
+            ): node
+            for node in subproblems
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                solution = future.result()
+                if solution is not None:
+                    node = futures[future]
+                    print(f"Solved by the subproblem {subproblems.index(node)}")
+                    return node.back_track(
+                        [start_board._spawn(pegs) for pegs in solution[:-1]]
+                    )
+    finally:
+        _terminate(executor)
+
+    return None
@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from search._node import Node
+from search.parallel import SOLVERS, _solve, _terminate
+
+DEFAULT_STRATEGIES = ["dfs", "best:corners", "best:isolated", "bfs"]
+
+
+def _parse_strategy(strategy: str) -> tuple[str, dict]:
+    """
+    Parses "solver" or "solver:heuristic" into a solver name and its keyword arguments
+    """
+    solver, _, heuristic = strategy.partition(":")
+    if solver not in SOLVERS:
+        raise ValueError(
+            f"Unknown solver {solver!r} in {strategy!r}, expected one of {', '.join(SOLVERS)}"
+        )
+    if heuristic and solver != "best":
+        raise ValueError(f"Only best first search takes a heuristic: {strategy!r}")
+    return solver, {"heuristic": heuristic} if heuristic else {}
+
+
+def portfolio_search(start_node: Node, strategies: list[str] | None = None):
+    """
+    Races several solvers on the same board, each in its own process, and returns
+    the first solution found. The other solvers are terminated, and the time every
+    strategy ran is reported.
+    """
+    infeasible = start_node.board.check_feasible()
+    if infeasible is not None:
+        return infeasible
+
+    strategies = strategies or DEFAULT_STRATEGIES
+    parsed = [_parse_strategy(strategy) for strategy in strategies]
+    start_board = start_node.board
+
+    executor = ProcessPoolExecutor(len(strategies))
+    st = time.time()
+    # seconds every strategy ran, and how it ended
+    report: dict[str, tuple[float, str]] = {}
+    sequence = None
+    try:
+        futures = {
+            executor.submit(
+                _solve,
+                type(start_board),
+                start_board._holes,
+                start_board._pegs,
+                solver,
+                kwargs,
+            ): strategy
+            for strategy, (solver, kwargs) in zip(strategies, parsed)
+        }
+        pending = set(futures)
+        while pending and sequence is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                solution = future.result()
+                if solution is None:
+                    outcome = "no solution"
+                elif sequence is None:
+                    outcome = "won"
+                    print(f"Winner: {futures[future]}")
+                    sequence = start_node.back_track(
+                        [start_board._spawn(pegs) for pegs in solution[:-1]]
+                    )
+                else:
+                    outcome = "solved, but not first"
+                report[futures[future]] = (time.time() - st, outcome)
+    finally:
+        _terminate(executor)
+        for strategy in strategies:
+            report.setdefault(strategy, (time.time() - st, "terminated"))
+
+    for strategy in strategies:
+        seconds, outcome = report[strategy]
+        print(f"{strategy}: {outcome} after {round(seconds, 3)}s")
+    return sequence
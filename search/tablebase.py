@@ -0,0 +1,64 @@
+from array import array
+from bisect import bisect_left
+import batch
+import bitboard
+
+
+def _parent_layer(layer: array, board) -> array:
+    """
+    Returns the sorted canonical keys of every board one reverse jump away from a
+    layer of canonical keys, board is any board with the same holes
+    """
+    if batch.AVAILABLE:
+        return batch.expand(layer, board._holes, backward=True)
+
+    keys = set()
+    for key in layer:
+        for parent in board._spawn(key)._parents():
+            keys.add(parent.canonical_key())
+    return array("Q", sorted(keys))
+
+
+class Tablebase:
+    """
+    Every board with at most max_pegs marbles from which the goal can be reached,
+    generated backwards from the goal with reverse jumps. Each layer is a sorted
+    array of canonical keys, 8 bytes a board.
+    Below max_pegs a lookup is an exact answer, no search is needed.
+    """
+
+    def __init__(self, board, max_pegs: int = 6):
+        self.holes = board._holes
+        self.max_pegs = max_pegs
+        goal = board._spawn(bitboard.CENTER_BIT)
+        # layers[i] holds the boards with i + 1 marbles
+        self.layers = [array("Q", [goal.canonical_key()])]
+        while len(self.layers) < max_pegs:
+            self.layers.append(_parent_layer(self.layers[-1], board))
+
+    def __len__(self) -> int:
+        return sum(len(layer) for layer in self.layers)
+
+    def probe(self, board) -> bool | None:
+        """
+        Returns whether the goal can be reached from the board, or None if the board is not covered
+        """
+        marbles = board.num_marbles
+        if board._holes != self.holes or marbles > self.max_pegs:
+            return None
+        if marbles == 0:
+            return False
+        layer = self.layers[marbles - 1]
+        key = board.canonical_key()
+        index = bisect_left(layer, key)
+        return index < len(layer) and layer[index] == key
+
+    def finish(self, board) -> list:
+        """
+        Returns the boards after a winnable board down to the goal, in the order back_track returns them
+        """
+        sequence = []
+        while not board.goal_test():
+            board = next(child for child in board.move_gen() if self.probe(child))
+            sequence.append(board)
+        return sequence[::-1]
@@ -0,0 +1,46 @@
+import pytest
+import winnability
+from board import Board
+
+np = pytest.importorskip("numpy")
+import batch
+
+
+@pytest.fixture(scope="module")
+def boards() -> list[Board]:
+    # every board a few jumps away from the standard start
+    layer = {Board()._pegs}
+    boards = []
+    for _ in range(4):
+        layer = {
+            child._pegs for pegs in layer for child in Board()._spawn(pegs).move_gen()
+        }
+        boards += [Board()._spawn(pegs) for pegs in sorted(layer)]
+    return boards
+
+
+@pytest.fixture(autouse=True)
+def no_database(monkeypatch):
+    monkeypatch.setattr(winnability, "DATABASE", None)
+
+
+def test_successors_match_move_gen(boards):
+    states = [board._pegs for board in boards]
+    children, parents, jumps = batch.successors(states, Board()._holes)
+    assert sorted(zip(parents.tolist(), jumps.tolist(), children.tolist())) == sorted(
+        (i, jump, child._pegs)
+        for i, board in enumerate(boards)
+        for jump, child in board._children()
+    )
+
+
+def test_canonical_matches_canonical_key(boards):
+    keys = batch.canonical([board._pegs for board in boards], Board()._holes)
+    assert keys.tolist() == [board.canonical_key() for board in boards]
+
+
+def test_predecessors_match_parents(boards):
+    parents = batch.predecessors([board._pegs for board in boards], Board()._holes)
+    assert sorted(parents.tolist()) == sorted(
+        parent._pegs for board in boards for parent in board._parents()
+    )
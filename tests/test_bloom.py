@@ -0,0 +1,56 @@
+import random
+import pytest
+from search.bloom import BloomFilter, BoundedKeySet
+
+
+def _keys(count: int, seed: int) -> list[int]:
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) for _ in range(count)]
+
+
+def test_added_keys_are_always_found():
+    keys = _keys(5_000, 23)
+    bloom = BloomFilter.for_keys(8 * 1024, len(keys))
+    bloom.update(keys)
+    assert all(bloom.contains_many(keys))
+
+
+def test_false_positive_rate_estimate():
+    bloom = BloomFilter.for_keys(8 * 1024, 5_000)
+    bloom.update(_keys(5_000, 23))
+    others = _keys(20_000, 24)
+    measured = sum(bloom.contains_many(others)) / len(others)
+    assert measured < 0.05
+    assert measured == pytest.approx(bloom.false_positive_rate(), abs=0.01)
+
+
+def test_serialisation_round_trip():
+    keys = _keys(1_000, 25)
+    bloom = BloomFilter(2_048, hashes=5)
+    bloom.update(keys)
+    copy = BloomFilter.from_bytes(bloom.to_bytes())
+    assert copy.hashes == 5
+    assert len(copy) == len(bloom)
+    assert copy.nbytes() == bloom.nbytes()
+    assert copy.false_positive_rate() == bloom.false_positive_rate()
+    assert copy.contains_many(_keys(5_000, 26)) == bloom.contains_many(_keys(5_000, 26))
+    assert all(copy.contains_many(keys))
+
+
+def test_from_bytes_rejects_other_data():
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(b"\0" * 64)
+
+
+def test_bounded_key_set_switches_at_the_budget():
+    keys = _keys(10_000, 27)
+    bounded = BoundedKeySet(16 * 1024)
+    bounded.update(keys[:100])
+    assert bounded.exact
+    assert bounded.false_positive_rate() == 0.0
+
+    bounded.update(keys[100:])
+    assert not bounded.exact
+    assert bounded.nbytes() <= 16 * 1024
+    assert all(bounded.contains_many(keys))
+    assert "bloom filter" in bounded.report()
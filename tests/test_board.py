@@ -0,0 +1,70 @@
+import bitboard
+import pytest
+from board import Board
+from search.heuristics import HEURISTICS, get_heuristic
+from search.tablebase import Tablebase
+
+
+@pytest.fixture(scope="module")
+def boards() -> list[Board]:
+    # every board a few jumps away from the standard start
+    layer = {Board()._pegs}
+    boards = []
+    for _ in range(4):
+        layer = {
+            child._pegs for pegs in layer for child in Board()._spawn(pegs).move_gen()
+        }
+        boards += [Board()._spawn(pegs) for pegs in sorted(layer)]
+    return boards
+
+
+@pytest.fixture(scope="module")
+def tablebase() -> Tablebase:
+    return Tablebase(Board(), max_pegs=7)
+
+
+def test_canonical_key_is_shared_by_the_symmetries(boards):
+    for board in boards:
+        keys = {
+            board._spawn(bitboard.transform(board._pegs, t)).canonical_key()
+            for t in range(len(bitboard.TRANSFORMS))
+        }
+        assert keys == {board.canonical_key()}
+
+
+def test_pagoda_never_rules_out_a_winnable_board(tablebase):
+    geometry = bitboard.geometry(tablebase.holes)
+    for layer in tablebase.layers:
+        for key in layer:
+            board = Board()._spawn(key)
+            assert geometry.pagoda_feasible(geometry.pagoda(board._pegs))
+            assert board.check_feasible() is None
+
+
+def test_move_gen_keeps_every_winnable_child(tablebase):
+    for layer in tablebase.layers[1:]:
+        for key in layer:
+            board = Board()._spawn(key)
+            legal = [
+                board._spawn(board._pegs ^ flip)
+                for needs, dst_bit, flip, _, _ in bitboard.geometry(board._holes).masks
+                if board._pegs & needs == needs and not board._pegs & dst_bit
+            ]
+            winnable = {
+                child.canonical_key() for child in legal if tablebase.probe(child)
+            }
+            assert winnable
+            assert winnable <= {child.canonical_key() for child in board.move_gen()}
+
+
+def test_child_keys_match_children(boards):
+    for board in boards:
+        children = board._children()
+        assert [(jump, key) for jump, key, _ in board._child_keys()] == [
+            (jump, child.canonical_key()) for jump, child in children
+        ]
+        for name in HEURISTICS:
+            score = get_heuristic(name)
+            assert [value for _, _, value in board._child_keys(score)] == [
+                score(child) for _, child in children
+            ]
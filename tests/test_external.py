@@ -0,0 +1,72 @@
+import errno
+import os
+import pytest
+import search.external
+from board import Board
+from search import Node, dhokla_first_search, external_bread_first_search
+
+# a few children per run, so every layer is written as several runs
+_RAM_LIMIT = 48 * 50
+
+
+@pytest.fixture(scope="module")
+def board() -> Board:
+    # a board from the middle of a known solution, small enough to search fully
+    solution = dhokla_first_search(Node(Board()))
+    return next(board for board in solution if board.num_marbles == 12)
+
+
+def _check(sequence: list, start: Board):
+    assert sequence[-1]._pegs == start._pegs
+    assert sequence[0].goal_test()
+    for board, parent in zip(sequence, sequence[1:]):
+        assert any(child._pegs == board._pegs for child in parent.move_gen())
+
+
+def test_solves_with_several_runs_per_layer(board, tmp_path):
+    sequence = external_bread_first_search(
+        Node(board.copy()), str(tmp_path), _RAM_LIMIT
+    )
+    _check(sequence, board)
+
+
+def test_resumes_after_a_crash(board, tmp_path, monkeypatch, capsys):
+    write_keys = search.external._write_keys
+    calls = 0
+
+    def crash(path, keys):
+        nonlocal calls
+        calls += 1
+        if calls == 20:
+            # die half way through the write of a run
+            with open(path + ".tmp", "wb") as f:
+                f.write(b"partial")
+            raise KeyboardInterrupt
+        write_keys(path, keys)
+
+    monkeypatch.setattr(search.external, "_write_keys", crash)
+    with pytest.raises(KeyboardInterrupt):
+        external_bread_first_search(Node(board.copy()), str(tmp_path), _RAM_LIMIT)
+    monkeypatch.undo()
+    assert any(name.endswith(".tmp") for name in os.listdir(tmp_path))
+
+    sequence = external_bread_first_search(
+        Node(board.copy()), str(tmp_path), _RAM_LIMIT
+    )
+    assert "Resuming" in capsys.readouterr().out
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
+    _check(sequence, board)
+
+
+def test_disk_limit(board, tmp_path):
+    with pytest.raises(OSError) as error:
+        external_bread_first_search(
+            Node(board.copy()), str(tmp_path), _RAM_LIMIT, disk_limit=64
+        )
+    assert error.value.errno == errno.ENOSPC
+
+
+def test_refuses_the_scratch_directory_of_another_board(board, tmp_path):
+    external_bread_first_search(Node(board.copy()), str(tmp_path), _RAM_LIMIT)
+    with pytest.raises(ValueError):
+        external_bread_first_search(Node(Board()), str(tmp_path), _RAM_LIMIT)
@@ -0,0 +1,56 @@
+import random
+from search.keyset import _GOLDEN, KeySet
+
+
+def test_matches_a_set_under_random_operations():
+    rng = random.Random(22)
+    keys = KeySet()
+    expected = set()
+    # a small key space, so adds and discards keep hitting the same keys
+    pool = [0] + [rng.getrandbits(64) for _ in range(2000)]
+    for _ in range(200_000):
+        key = rng.choice(pool)
+        operation = rng.random()
+        if operation < 0.5:
+            keys.add(key)
+            expected.add(key)
+        elif operation < 0.8:
+            keys.discard(key)
+            expected.discard(key)
+        else:
+            assert (key in keys) == (key in expected)
+        assert len(keys) == len(expected)
+
+    assert sorted(keys) == sorted(expected)
+    assert keys.contains_many(pool) == [key in expected for key in pool]
+
+
+def test_keys_survive_rehashing():
+    keys = KeySet(range(1, 10_000))
+    assert len(keys) == 9_999
+    assert all(key in keys for key in range(1, 10_000))
+    assert 10_000 not in keys
+    # at most half full
+    assert keys.nbytes() >= 2 * 8 * len(keys)
+
+
+def test_deleted_keys_do_not_break_probe_sequences():
+    keys = KeySet(capacity=100)
+    # keys hashing to the same slot form one probe sequence
+    slot = lambda key: (key * _GOLDEN >> 32) & keys._mask
+    colliding = [key for key in range(1, 100_000) if slot(key) == slot(1)][:7]
+    assert len(colliding) == 7
+    keys.update(colliding)
+    for key in colliding[::2]:
+        keys.discard(key)
+    assert [key in keys for key in colliding] == [i % 2 == 1 for i in range(7)]
+    keys.add(colliding[0])
+    assert colliding[0] in keys
+    assert len(keys) == 4
+
+
+def test_zero_key():
+    keys = KeySet([0])
+    assert 0 in keys and len(keys) == 1
+    keys.discard(0)
+    assert 0 not in keys and len(keys) == 0
@@ -0,0 +1,54 @@
+import bitboard
+import pytest
+import winnability
+from board import Board
+from search.tablebase import Tablebase
+
+# a cross of 13 holes around the centre, small enough to enumerate every board
+_HOLES = (
+    sum(bitboard.bit(row, column) for row in range(2, 5) for column in range(2, 5))
+    | bitboard.bit(1, 3)
+    | bitboard.bit(3, 1)
+    | bitboard.bit(3, 5)
+    | bitboard.bit(5, 3)
+)
+
+
+@pytest.fixture(scope="module")
+def board() -> Board:
+    board = Board()
+    board._holes = _HOLES
+    return board._spawn(_HOLES)
+
+
+@pytest.fixture(scope="module")
+def database(board, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("winnability") / "cross.bin")
+    winnability.build(path, _HOLES)
+    database = winnability.WinnabilityDatabase(path)
+    yield database
+    database.close()
+
+
+def _all_boards(board: Board) -> list[Board]:
+    cells = list(bitboard.cells(_HOLES))
+    return [
+        board._spawn(sum(1 << cell for i, cell in enumerate(cells) if mask >> i & 1))
+        for mask in range(1, 1 << len(cells))
+    ]
+
+
+def test_matches_a_full_tablebase(board, database):
+    tablebase = Tablebase(board, max_pegs=_HOLES.bit_count())
+    boards = _all_boards(board)
+    assert database.covers(board)
+    assert [database.is_winnable(other) for other in boards] == [
+        tablebase.probe(other) for other in boards
+    ]
+    assert any(database.is_winnable(other) for other in boards)
+
+
+def test_winnable_boards_pass_the_feasibility_checks(board, database):
+    for other in _all_boards(board):
+        if database.is_winnable(other):
+            assert other.check_feasible() is None
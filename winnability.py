@@ -0,0 +1,166 @@
+"""
+Offline database telling for every board whether the goal can still be reached.
+
+Peg solitaire is its own reverse: complementing the marbles (within the holes)
+turns a jump into a jump in the opposite direction. A board can therefore reach a
+single centre marble exactly when its complement can be reached from the full
+board minus the centre, ie from the standard start. The builder enumerates every
+board reachable from the start, and marks the complement of each as winnable.
+
+The file is a 16 byte header followed by one bit per possible board, indexed by
+the canonical key with the cells outside the holes squeezed out (2**33 bits, 1 GiB
+for the english board). It is memory mapped, a lookup reads a single byte.
+"""
+
+import argparse
+import mmap
+import os
+import time
+import bitboard
+
+_MAGIC = b"BVWIN\0\0\0"
+_HEADER = 16
+
+_tables: dict[int, list[tuple[int, list[int]]]] = {}
+
+
+def _compress_tables(holes: int) -> list[tuple[int, list[int]]]:
+    """
+    Returns, for every row, the offset of its first hole and the squeezed value of all 128 row patterns
+    """
+    if holes not in _tables:
+        tables = []
+        offset = 0
+        for row in range(bitboard.SIZE):
+            row_holes = (holes >> (row * bitboard.SIZE)) & 0x7F
+            table = []
+            for pattern in range(1 << bitboard.SIZE):
+                value = 0
+                for i, column in enumerate(bitboard.cells(row_holes)):
+                    if pattern >> column & 1:
+                        value |= 1 << i
+                table.append(value)
+            tables.append((offset, table))
+            offset += row_holes.bit_count()
+        _tables[holes] = tables
+    return _tables[holes]
+
+
+def compress(pegs: int, holes: int) -> int:
+    """
+    Packs the marbles into popcount(holes) bits, dropping the cells which are not holes
+    """
+    value = 0
+    for row, (offset, table) in enumerate(_compress_tables(holes)):
+        value |= table[(pegs >> (row * bitboard.SIZE)) & 0x7F] << offset
+    return value
+
+
+def build(path: str, holes: int = bitboard.ENGLISH_HOLES):
+    """
+    Enumerates every board reachable from the start (all holes but the centre) and writes the database
+    """
+    geometry = bitboard.geometry(holes)
+    jumps = [(needs, dst_bit, flip) for needs, dst_bit, flip, _, _ in geometry.masks]
+    size = _HEADER + (1 << holes.bit_count()) // 8
+
+    with open(path + ".tmp", "wb") as f:
+        f.write(_MAGIC + holes.to_bytes(8, "little"))
+        f.truncate(size)
+
+    with open(path + ".tmp", "r+b") as f, mmap.mmap(f.fileno(), size) as bits:
+        # every move removes a marble, so a layer never reaches a state of another one
+        layer = {bitboard.canonical(holes & ~bitboard.CENTER_BIT, holes)}
+        total = 0
+        while layer:
+            print(
+                f"Marbles left: {next(iter(layer)).bit_count()} | States: {len(layer)}"
+            )
+            total += len(layer)
+            next_layer = set()
+            for pegs in layer:
+                index = compress(bitboard.canonical(holes ^ pegs, holes), holes)
+                bits[_HEADER + (index >> 3)] |= 1 << (index & 7)
+
+                for needs, dst_bit, flip in jumps:
+                    if pegs & needs == needs and not pegs & dst_bit:
+                        next_layer.add(bitboard.canonical(pegs ^ flip, holes))
+            layer = next_layer
+        bits.flush()
+
+    os.replace(path + ".tmp", path)
+    print(f"Reachable states: {total}")
+
+
+class WinnabilityDatabase:
+    """
+    Read only view of a database written by `build`
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._bits = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._bits[:8] != _MAGIC:
+            raise ValueError(f"{path} is not a winnability database")
+        self.holes = int.from_bytes(self._bits[8:_HEADER], "little")
+        if len(self._bits) != _HEADER + (1 << self.holes.bit_count()) // 8:
+            raise ValueError(f"{path} is truncated")
+
+    def covers(self, board) -> bool:
+        """
+        Returns True if the database was built for the holes of the board
+        """
+        return board._holes == self.holes
+
+    def is_winnable(self, board) -> bool:
+        """
+        Returns True if a single marble in the centre can still be reached from the board
+        """
+        return self.is_winnable_key(board.canonical_key())
+
+    def is_winnable_key(self, key: int) -> bool:
+        """
+        Same as is_winnable, from the canonical key of a board
+        """
+        index = compress(key, self.holes)
+        return bool(self._bits[_HEADER + (index >> 3)] >> (index & 7) & 1)
+
+    def bitmap(self) -> memoryview:
+        """
+        Returns the bits of the database, bit i of byte j for the board of index 8j + i
+        (see compress). The view has to be released before close.
+        """
+        return memoryview(self._bits)[_HEADER:]
+
+    def close(self):
+        self._bits.close()
+
+
+# database consulted by `board.Board.move_gen`, set with `load`
+DATABASE: WinnabilityDatabase | None = None
+
+
+def load(path: str) -> WinnabilityDatabase:
+    """
+    Opens a database and makes move generation drop every child which can not be won
+    """
+    global DATABASE
+    DATABASE = WinnabilityDatabase(path)
+    return DATABASE
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build the winnability database of the english board"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="winnable.bin",
+        help="File to write the database to. Default: winnable.bin",
+    )
+    args = parser.parse_args()
+
+    st = time.time()
+    build(args.output)
+    print(f"Time taken: {round(time.time() - st, 3)}s | Saved to {args.output}")